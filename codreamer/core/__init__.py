@@ -10,10 +10,11 @@ from .config import (
     PROJECT_ROOT,
     RANDOM_SEED,
     ROLLOUTS_PER_GROUP,
+    run_async,
     setup_logging,
 )
 from .data_models import FinalEmail, KGNode, Prospect, Scenario
-from .prompts import SYSTEM_PROMPT
+from .prompts import SYSTEM_PROMPT, SYSTEM_PROMPT_FRAGMENTS
 
 __all__ = [
     "FEEDBACK_FILES",
@@ -25,11 +26,13 @@ __all__ = [
     "PROJECT_ROOT",
     "RANDOM_SEED",
     "ROLLOUTS_PER_GROUP",
+    "run_async",
     "setup_logging",
     "FinalEmail",
     "KGNode",
     "Prospect",
     "Scenario",
     "SYSTEM_PROMPT",
+    "SYSTEM_PROMPT_FRAGMENTS",
 ]
 
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Coroutine
 from pathlib import Path
-from typing import Final
+import time
+from typing import Any, Final, TypeVar
 
 from loguru import logger
 
@@ -15,6 +18,11 @@ ROLLOUTS_PER_GROUP: Final[int] = 5
 LEARNING_RATE: Final[float] = 1e-5
 MAX_STEPS: Final[int] = 2
 RANDOM_SEED: Final[int] = 7
+# Upper bound on concurrent LLM-bound coroutines (rollouts, judge calls)
+MAX_CONCURRENCY: Final[int] = 8
+# Default completion requests per second shared by all in-flight rollouts (bursts up to
+# MAX_CONCURRENCY); the ROLLOUT_QPS env var overrides it, and 0 disables pacing
+ROLLOUT_QPS: Final[float] = 10.0
 
 # Feedback sources (modular). Append additional JSONL files here to include
 # external feedback providers without code changes.
@@ -22,13 +30,40 @@ FEEDBACK_FILES: Final[list[Path]] = [PROJECT_ROOT / "data" / "feedback.jsonl"]
 FEEDBACK_WRITE_PATH: Final[Path] = FEEDBACK_FILES[0]
 
 
+# (epoch second, "HH:MM:SS") of the last formatted log time
+_HMS_CACHE: list[Any] = [-1, ""]
+
+
+def _patch_hms(record: dict[str, Any]) -> None:
+    # Format the wall-clock time at most once per second instead of per record
+    now = int(time.time())
+    if now != _HMS_CACHE[0]:
+        _HMS_CACHE[0] = now
+        _HMS_CACHE[1] = time.strftime("%H:%M:%S", time.localtime(now))
+    record["extra"]["hms"] = _HMS_CACHE[1]
+
+
 def setup_logging() -> None:
     """Configure loguru sinks for concise, colorful console logging."""
     logger.remove()
+    logger.configure(patcher=_patch_hms)
     logger.add(
         lambda msg: print(msg, end=""),
         level="INFO",
-        format="<green>{time:HH:mm:ss}</green> | <level>{message}</level>",
+        format="<green>{extra[hms]}</green> | <level>{message}</level>",
         colorize=True,
+        # Write from a background thread so concurrent rollouts never block on console I/O
+        enqueue=True,
     )
 
+
+T = TypeVar("T")
+
+
+def run_async(main: Coroutine[Any, Any, T]) -> T:
+    """asyncio.run on uvloop when it is installed, else on the default loop."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    return uvloop.run(main)
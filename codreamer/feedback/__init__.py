@@ -2,11 +2,14 @@
 
 from .feedback import (
     BaseFeedback,
+    FeedbackWriter,
     HumanPreference,
     OnlineOutcome,
     RewardMixConfig,
     RULERFeedback,
     append_event,
+    append_events,
+    clear_hash_cache,
     compute_rewards,
     ensure_feedback_file,
     hash_trajectory,
@@ -14,11 +17,14 @@ from .feedback import (
 
 __all__ = [
     "BaseFeedback",
+    "FeedbackWriter",
     "HumanPreference",
     "OnlineOutcome",
     "RewardMixConfig",
     "RULERFeedback",
     "append_event",
+    "append_events",
+    "clear_hash_cache",
     "compute_rewards",
     "ensure_feedback_file",
     "hash_trajectory",
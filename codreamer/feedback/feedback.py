@@ -9,27 +9,53 @@ Events are appended to a JSONL file. Rewards are computed as a weighted mix:
 All functions are synchronous and file-based for MVP simplicity.
 """
 
-import hashlib
+import functools
 import json
+import os
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable, Literal
+from typing import Any, Callable, Iterable, Literal
 
 from loguru import logger
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, ConfigDict
+import xxhash
 
 from ..core.config import FEEDBACK_FILES, FEEDBACK_WRITE_PATH
 
 
 FEEDBACK_PATH: Path = FEEDBACK_WRITE_PATH
+# Side-car index (trajectory_id -> byte ranges) kept next to each feedback file
+FEEDBACK_INDEX_SUFFIX = ".idx.json"
+FEEDBACK_INDEX_PATH: Path = FEEDBACK_WRITE_PATH.with_suffix(FEEDBACK_INDEX_SUFFIX)
+# Persist the index only after this many newly indexed bytes, so small appends
+# don't rewrite the whole side-car on every compute_rewards call
+_INDEX_SAVE_MIN_BYTES = 1 << 20
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
 class BaseFeedback(BaseModel):
+    # Events are immutable records once logged; frozen + hashable so they can
+    # be used as lru_cache keys or set members.
+    model_config = ConfigDict(frozen=True)
+
     trajectory_id: str
     prospect_id: str
     step: int
     ts: datetime
 
+    def __hash__(self) -> int:
+        # Pydantic's default frozen hash fails on dict fields such as rubric
+        return hash((type(self), _freeze(self.__dict__)))
+
 
 class RULERFeedback(BaseFeedback):
     kind: Literal["ruler"] = "ruler"
@@ -68,130 +94,392 @@ def ensure_feedback_file(path: Path | None = None) -> None:
     p.touch(exist_ok=True)
 
 
-def append_event(event: BaseFeedback, path: Path | None = None) -> None:
+# Per-class dumpers bound to the compiled pydantic-core serializer, so each
+# write skips the model_dump wrapper and its schema lookup.
+_DUMPER_CACHE: dict[type, Callable[[BaseFeedback], dict[str, Any]]] = {}
+
+
+def _dump(event: BaseFeedback) -> dict[str, Any]:
+    cls = type(event)
+    fn = _DUMPER_CACHE.get(cls)
+    if fn is None:
+        to_python = cls.__pydantic_serializer__.to_python
+
+        def fn(e: BaseFeedback) -> dict[str, Any]:
+            return to_python(e, mode="python", by_alias=True)
+
+        _DUMPER_CACHE[cls] = fn
+    return fn(event)
+
+
+def _serialize(event: BaseFeedback) -> bytes:
+    # orjson emits bytes directly and encodes datetime natively (ISO 8601)
+    return orjson.dumps(_dump(event), default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+class FeedbackWriter:
+    """Buffered JSONL appender holding one open handle across many writes.
+
+    Prefer this over append_event in loops; use as a context manager so the
+    buffer is flushed before compute_rewards reads the file back.
+    """
+
+    def __init__(self, path: Path | None = None, buffer_bytes: int = 1 << 16) -> None:
+        self.path = path or FEEDBACK_PATH
+        ensure_feedback_file(self.path)
+        self._f = self.path.open("ab", buffering=buffer_bytes)
+
+    def write(self, event: BaseFeedback) -> None:
+        self._f.write(_serialize(event))
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self) -> "FeedbackWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def append_events(events: Iterable[BaseFeedback], path: Path | None = None) -> None:
+    """Append several events with a single open and one buffered write."""
     p = path or FEEDBACK_PATH
     ensure_feedback_file(p)
-    with p.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event.model_dump(mode="python", by_alias=True), default=str) + "\n")
+    payload = b"".join(_serialize(e) for e in events)
+    if not payload:
+        return
+    with p.open("ab", buffering=1 << 16) as f:
+        f.write(payload)
+
+
+def append_event(event: BaseFeedback, path: Path | None = None) -> None:
+    append_events([event], path=path)
+
+
+def _needles_for(traj_ids: set[str]) -> list[bytes]:
+    # Quoted id values as they may appear on disk: ASCII-escaped (older stdlib
+    # json lines) and raw UTF-8 (orjson). Matching the value alone covers both the
+    # '"trajectory_id": "..."' and compact '"trajectory_id":"..."' layouts.
+    needles: set[bytes] = set()
+    for tid in traj_ids:
+        needles.add(json.dumps(tid).encode("ascii"))
+        needles.add(orjson.dumps(tid))
+    return list(needles)
+
+
+class _StaleIndex(Exception):
+    pass
+
+
+# In-process cache of loaded indexes, keyed by feedback file path
+_INDEX_CACHE: dict[Path, dict[str, Any]] = {}
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(FEEDBACK_INDEX_SUFFIX)
+
+
+def _empty_index(ino: int) -> dict[str, Any]:
+    return {"ino": ino, "size": 0, "offsets": {}}
+
+
+def _load_index(path: Path) -> dict[str, Any] | None:
+    idx_path = _index_path(path)
+    if not idx_path.exists():
+        return None
+    try:
+        idx = orjson.loads(idx_path.read_bytes())
+        idx["saved_size"] = int(idx["size"])
+        return idx
+    except Exception:
+        return None
+
+
+def _save_index(path: Path, idx: dict[str, Any]) -> None:
+    idx_path = _index_path(path)
+    tmp = idx_path.with_suffix(".tmp")
+    payload = {"ino": idx["ino"], "size": idx["size"], "offsets": idx["offsets"]}
+    try:
+        tmp.write_bytes(orjson.dumps(payload))
+        os.replace(tmp, idx_path)
+        idx["saved_size"] = idx["size"]
+    except OSError as e:
+        logger.debug(f"feedback index not saved for {path}: {e}")
+
+
+def _refresh_index(path: Path) -> dict[str, Any]:
+    """Return the offset index for path, indexing only bytes appended since last use."""
+    st = path.stat()
+    idx = _INDEX_CACHE.get(path) or _load_index(path)
+    # Rebuild if the file was replaced or truncated
+    if idx is None or idx.get("ino") != st.st_ino or int(idx.get("size", 0)) > st.st_size:
+        idx = _empty_index(st.st_ino)
+    start = int(idx["size"])
+    if start < st.st_size:
+        offsets: dict[str, list[list[int]]] = idx["offsets"]
+        pos = start
+        with path.open("rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partial trailing write; index it next time
+                try:
+                    tid = orjson.loads(line).get("trajectory_id")
+                except Exception:
+                    tid = None
+                if isinstance(tid, str):
+                    offsets.setdefault(tid, []).append([pos, len(line)])
+                pos += len(line)
+        idx["size"] = pos
+        if pos - int(idx.get("saved_size", 0)) >= _INDEX_SAVE_MIN_BYTES:
+            _save_index(path, idx)
+    _INDEX_CACHE[path] = idx
+    return idx
+
+
+def _read_indexed(path: Path, traj_ids: set[str]) -> list[dict[str, Any]]:
+    offsets = _refresh_index(path)["offsets"]
+    # Read in file order so aggregation order matches a linear scan
+    ranges = sorted(r for tid in traj_ids for r in offsets.get(tid, ()))
+    if not ranges:
+        return []
+    events: list[dict[str, Any]] = []
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        for off, length in ranges:
+            obj = orjson.loads(os.pread(fd, length, off))
+            if obj.get("trajectory_id") not in traj_ids:
+                raise _StaleIndex(path)
+            events.append(obj)
+    finally:
+        os.close(fd)
+    return events
+
+
+def _scan_events(path: Path, traj_ids: set[str], needles: list[bytes]) -> Iterable[dict[str, Any]]:
+    with path.open("rb") as f:
+        for line in f:
+            # Cheap substring prefilter: only parse lines mentioning a target id
+            if not any(n in line for n in needles):
+                continue
+            try:
+                obj = orjson.loads(line)
+                if obj.get("trajectory_id") in traj_ids:
+                    yield obj
+            except Exception:
+                continue
 
 
 def _iter_events_for(traj_ids: set[str]) -> Iterable[dict[str, Any]]:
+    if not traj_ids:
+        return
+    needles = _needles_for(traj_ids)
     for file_path in FEEDBACK_FILES:
         if not file_path.exists():
             continue
-        with file_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    obj = json.loads(line)
-                    if obj.get("trajectory_id") in traj_ids:
-                        yield obj
-                except Exception:
-                    continue
+        try:
+            yield from _read_indexed(file_path, traj_ids)
+            continue
+        except Exception as e:
+            # Missing/stale/corrupt index: drop it and fall back to a linear scan
+            logger.debug(f"feedback index unusable for {file_path} ({e!r}); scanning")
+            _INDEX_CACHE.pop(file_path, None)
+            _index_path(file_path).unlink(missing_ok=True)
+        yield from _scan_events(file_path, traj_ids, needles)
+
+
+# Simple ordinal: closed_won > opportunity > call > replied > opened.
+# Ordered best-first so the first set flag is the event's score.
+_ONLINE_WEIGHTS_DESC: tuple[tuple[str, float], ...] = (
+    ("closed_won", 1.0),
+    ("opportunity", 0.8),
+    ("call_booked", 0.6),
+    ("replied", 0.4),
+    ("opened", 0.2),
+)
+_ONLINE_MAX = _ONLINE_WEIGHTS_DESC[0][1]
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalized_rank(rank: int, group_size: int) -> float:
+    # Normalize: best rank 1 → 1.0, worst rank group_size → 0.0
+    return ((group_size - rank) / (group_size - 1)) if group_size > 1 else 0.0
+
 
+@dataclass(slots=True)
+class _ScoreState:
+    """Running RULER/human/online accumulators for one trajectory."""
 
-def _ruler_score_from_events(events: list[dict[str, Any]]) -> float:
-    ranks: list[tuple[int, int]] = []
-    rubric_scores: list[float] = []
-    for e in events:
-        if e.get("kind") == "ruler":
+    trajectory_id: str
+    # RULER: mean normalized rank and mean rubric score
+    rank_sum: float = 0.0
+    rank_count: int = 0
+    rubric_sum: float = 0.0
+    rubric_count: int = 0
+    # Human: Bradley–Terry-like win rate proxy
+    wins: float = 0.0
+    total: float = 0.0
+    # Online: best outcome seen
+    max_online: float = 0.0
+
+    def update(self, e: dict[str, Any]) -> None:
+        kind = e.get("kind")
+        if kind == "ruler":
             rank = int(e.get("rank", 0))
             group_size = max(1, int(e.get("group_size", 1)))
             if group_size > 1:
-                ranks.append((rank, group_size))
+                self.rank_sum += _normalized_rank(rank, group_size)
+                self.rank_count += 1
             rubric = e.get("rubric", {})
             if rubric:
-                rubric_scores.append(sum(float(v) for v in rubric.values()) / max(1, len(rubric)))
-    rank_component = 0.0
-    if ranks:
-        # Normalize: best rank 1 → 1.0, worst rank group_size → 0.0
-        vals = [((gs - r) / (gs - 1)) if gs > 1 else 0.0 for r, gs in ranks]
-        rank_component = sum(vals) / len(vals)
-    rubric_component = sum(rubric_scores) / len(rubric_scores) if rubric_scores else 0.0
-    return 0.5 * rank_component + 0.5 * rubric_component
-
-
-def _human_score_from_events(events: list[dict[str, Any]], trajectory_id: str) -> float:
-    # Bradley–Terry-like win rate proxy
-    wins = 0.0
-    total = 0.0
-    for e in events:
-        if e.get("kind") == "human":
+                self.rubric_sum += sum(float(v) for v in rubric.values()) / max(1, len(rubric))
+                self.rubric_count += 1
+        elif kind == "human":
             conf = float(e.get("confidence", 1.0))
-            if e.get("winner") == trajectory_id:
-                wins += conf
-                total += conf
-            elif e.get("loser") == trajectory_id:
-                total += conf
-    return (wins / total) if total > 0 else 0.0
-
-
-def _online_score_from_events(events: list[dict[str, Any]]) -> float:
-    # Simple ordinal: closed_won > opportunity > call > replied > opened
-    weights = {
-        "opened": 0.2,
-        "replied": 0.4,
-        "call_booked": 0.6,
-        "opportunity": 0.8,
-        "closed_won": 1.0,
-    }
-    max_score = 0.0
-    for e in events:
-        if e.get("kind") == "online":
-            for k, w in weights.items():
-                if bool(e.get(k, False)):
-                    max_score = max(max_score, w)
-    return max_score
+            if e.get("winner") == self.trajectory_id:
+                self.wins += conf
+                self.total += conf
+            elif e.get("loser") == self.trajectory_id:
+                self.total += conf
+        elif kind == "online" and self.max_online < _ONLINE_MAX:
+            for k, w in _ONLINE_WEIGHTS_DESC:
+                if w <= self.max_online:
+                    break  # remaining flags can't raise the max
+                if e.get(k):
+                    self.max_online = w
+                    break
+
+    def scores(self) -> tuple[float, float, float]:
+        """Return (ruler, human, online) component scores."""
+        rank_component = self.rank_sum / self.rank_count if self.rank_count else 0.0
+        rubric_component = self.rubric_sum / self.rubric_count if self.rubric_count else 0.0
+        r_ruler = 0.5 * rank_component + 0.5 * rubric_component
+        r_human = (self.wins / self.total) if self.total > 0 else 0.0
+        return r_ruler, r_human, self.max_online
+
+
+def _feedback_files_sig() -> tuple[tuple[str, int, int], ...]:
+    sig: list[tuple[str, int, int]] = []
+    for p in FEEDBACK_FILES:
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        sig.append((str(p), st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+@functools.lru_cache(maxsize=256)
+def _compute_rewards_cached(
+    traj_ids: tuple[str, ...],
+    files_sig: tuple[tuple[str, int, int], ...],
+    cfg_sig: tuple[float, float, float, float],
+) -> tuple[tuple[str, float], ...]:
+    # files_sig is only part of the cache key: any append changes mtime/size
+    alpha, beta, gamma, _lambda_return = cfg_sig
+    # Fold events into per-trajectory accumulators as they stream in
+    accum: dict[str, _ScoreState] = {tid: _ScoreState(tid) for tid in traj_ids}
+    for ev in _iter_events_for(set(accum)):
+        state = accum.get(ev.get("trajectory_id"))
+        if state is not None:
+            state.update(ev)
+
+    rewards: list[tuple[str, float]] = []
+    for tid, state in accum.items():
+        r_ruler, r_human, r_online = state.scores()
+        rewards.append((tid, alpha * r_ruler + beta * r_human + gamma * r_online))
+    return tuple(rewards)
 
 
 def compute_rewards(trajectory_ids: list[str], cfg: RewardMixConfig | None = None) -> dict[str, float]:
     cfg = cfg or RewardMixConfig()
-    traj_id_set = set(trajectory_ids)
-    # Bucket events per trajectory
-    buckets: dict[str, list[dict[str, Any]]] = {tid: [] for tid in trajectory_ids}
-    for ev in _iter_events_for(traj_id_set):
-        tid = ev.get("trajectory_id")
-        if tid in buckets:
-            buckets[tid].append(ev)
-
-    rewards: dict[str, float] = {}
-    for tid, events in buckets.items():
-        r_ruler = _ruler_score_from_events(events)
-        r_human = _human_score_from_events(events, tid)
-        r_online = _online_score_from_events(events)
-        rewards[tid] = cfg.alpha * r_ruler + cfg.beta * r_human + cfg.gamma * r_online
-    return rewards
+    cfg_sig = (cfg.alpha, cfg.beta, cfg.gamma, cfg.lambda_return)
+    return dict(_compute_rewards_cached(tuple(trajectory_ids), _feedback_files_sig(), cfg_sig))
+
+
+def _role_content_from_dump(item: Any) -> tuple[str, str]:
+    try:
+        d = item.model_dump()
+    except Exception:
+        d = {}
+    if "message" in d and isinstance(d["message"], dict):
+        return str(d["message"].get("role", "")), str(d["message"].get("content", ""))
+    return str(d.get("role", "")), str(d.get("content", ""))
+
+
+@functools.singledispatch
+def _extract_role_content(item: Any) -> tuple[str, str]:
+    if hasattr(item, "model_dump"):
+        return _role_content_from_dump(item)
+    # Generic objects: attempt attribute access
+    msg = getattr(item, "message", item)
+    return str(getattr(msg, "role", getattr(item, "role", ""))), str(getattr(msg, "content", getattr(item, "content", "")))
+
+
+@_extract_role_content.register(dict)
+def _(item: dict) -> tuple[str, str]:
+    return str(item.get("role", "")), str(item.get("content", ""))
+
+
+# Pydantic models (incl. OpenAI Choice objects)
+@_extract_role_content.register(BaseModel)
+def _(item: BaseModel) -> tuple[str, str]:
+    # Read fields directly instead of model_dump(), which would also copy
+    # large payloads such as logprobs just to reach role/content
+    msg = getattr(item, "message", None)
+    if msg is None:
+        return str(getattr(item, "role", "")), str(getattr(item, "content", ""))
+    if isinstance(msg, BaseModel):
+        return str(getattr(msg, "role", "")), str(getattr(msg, "content", ""))
+    if isinstance(msg, dict):
+        return str(msg.get("role", "")), str(msg.get("content", ""))
+    return _role_content_from_dump(item)
+
+
+# id(list) -> (list, len, last item, digest). Holding the list and its last
+# item keeps their ids from being reused while the entry is cached.
+_TRAJ_HASH_CACHE: dict[int, tuple[list[Any], int, Any, str]] = {}
+_TRAJ_HASH_CACHE_MAX = 1024
+
+
+def clear_hash_cache() -> None:
+    _TRAJ_HASH_CACHE.clear()
 
 
 def hash_trajectory(messages_and_choices: list[Any]) -> str:
     """Stable id from the content of a trajectory.
 
     Handles dicts, Pydantic models, and OpenAI/ART Choice-like objects.
+    Ids only need to be stable and collision-resistant, not cryptographic,
+    so a fast 128-bit XXH3 digest is used. Results are cached per list object
+    and recomputed when its length or last element changes; in-place edits
+    of earlier items are not detected.
     """
-    m = hashlib.sha1()
+    key = id(messages_and_choices)
+    n = len(messages_and_choices)
+    last = messages_and_choices[-1] if n else None
+    hit = _TRAJ_HASH_CACHE.get(key)
+    if hit is not None and hit[0] is messages_and_choices and hit[1] == n and hit[2] is last:
+        return hit[3]
+
+    # Frame every item as role \x1e content \x1f and hash the whole buffer once
+    buf = bytearray()
     for item in messages_and_choices:
-        role = ""
-        content = ""
-        if isinstance(item, dict):
-            role = str(item.get("role", ""))
-            content = str(item.get("content", ""))
-        else:
-            # Pydantic model with model_dump
-            if hasattr(item, "model_dump"):
-                try:
-                    d = item.model_dump()
-                except Exception:
-                    d = {}
-                if "message" in d and isinstance(d["message"], dict):
-                    role = str(d["message"].get("role", ""))
-                    content = str(d["message"].get("content", ""))
-                else:
-                    role = str(d.get("role", ""))
-                    content = str(d.get("content", ""))
-            else:
-                # Generic objects: attempt attribute access
-                role = str(getattr(getattr(item, "message", item), "role", getattr(item, "role", "")))
-                content = str(getattr(getattr(item, "message", item), "content", getattr(item, "content", "")))
-        m.update(role.encode("utf-8", errors="ignore"))
-        m.update(content.encode("utf-8", errors="ignore"))
-    return m.hexdigest()
-
+        role, content = _extract_role_content(item)
+        buf += role.encode("utf-8", errors="ignore")
+        buf += b"\x1e"
+        buf += content.encode("utf-8", errors="ignore")
+        buf += b"\x1f"
+    digest = xxhash.xxh3_128_hexdigest(buf)
+
+    if isinstance(messages_and_choices, list):
+        _TRAJ_HASH_CACHE.pop(key, None)
+        if len(_TRAJ_HASH_CACHE) >= _TRAJ_HASH_CACHE_MAX:
+            del _TRAJ_HASH_CACHE[next(iter(_TRAJ_HASH_CACHE))]
+        _TRAJ_HASH_CACHE[key] = (messages_and_choices, n, last, digest)
+    return digest
@@ -1,7 +1,7 @@
 """Knowledge graph storage and scoring."""
 
-from .kg_scoring import KGScorer
+from .kg_scoring import KGScorer, delta_log_path
 from .kg_store import KnowledgeGraphStore
 
-__all__ = ["KGScorer", "KnowledgeGraphStore"]
+__all__ = ["KGScorer", "KnowledgeGraphStore", "delta_log_path"]
 
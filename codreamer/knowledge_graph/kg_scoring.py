@@ -1,48 +1,172 @@
 from __future__ import annotations
 
-import json
+import os
 from pathlib import Path
-from typing import Any
+import threading
+from typing import Any, BinaryIO
 
 from loguru import logger
+import numpy as np
+import orjson
 import weave
 
 from ..core.config import PROJECT_ROOT
 from .kg_store import KnowledgeGraphStore
 
+# Fold the delta log back into the snapshot once it grows past this many lines
+COMPACT_EVERY = 1024
+# Coalesce this many update_from_trajectory calls into one delta append
+FLUSH_EVERY = 16
+
+
+def delta_log_path(scores_path: Path) -> Path:
+    """Append-only update log that sits next to a scores snapshot."""
+    return scores_path.with_suffix(".delta.jsonl")
+
 
 class KGScorer:
-    """JSON-backed node scorer for ranking and reward updates."""
+    """JSON-backed node scorer for ranking and reward updates.
+
+    Updates are appended to a small delta log ({"nid", "v"} per line) instead of
+    rewriting the whole snapshot. The log is replayed on load and folded back
+    into the snapshot by compact(), which runs on load, every COMPACT_EVERY
+    lines, and whenever callers need the JSON file itself to be current.
 
-    def __init__(self, scores_path: Path | None = None) -> None:
+    Appends are batched: updates stay in memory and are written once every
+    flush_every calls. Call flush() at step boundaries (or close()) to persist
+    pending updates; other KGScorer instances only see flushed scores.
+
+    Pass an already-loaded kg to reconcile against it instead of re-reading graph.json.
+    """
+
+    def __init__(
+        self,
+        scores_path: Path | None = None,
+        compact_every: int = COMPACT_EVERY,
+        flush_every: int = FLUSH_EVERY,
+        kg: KnowledgeGraphStore | None = None,
+    ) -> None:
         self.path = scores_path or (PROJECT_ROOT / "data" / "node_scores.json")
-        with self.path.open("r", encoding="utf-8") as f:
-            self.scores: dict[str, float] = json.load(f)
+        self.delta_path = delta_log_path(self.path)
+        self.compact_every = compact_every
+        self.flush_every = max(1, flush_every)
+        self._lock = threading.RLock()
+        self._delta: BinaryIO | None = None
+        self._delta_lines = 0
+        self._pending: list[bytes] = []
+        self._batch_counter = 0
+        self._dirty = False
+        loaded: dict[str, float] = orjson.loads(self.path.read_bytes())
+        self.scores = dict(loaded)
+        replayed = self._replay_delta()
         # Reconcile with graph nodes (drop unknown keys, add missing with default 1.0, clamp values)
-        kg = KnowledgeGraphStore()
+        if kg is None:
+            kg = KnowledgeGraphStore()
         graph_ids = set(kg.nodes.keys())
         reconciled: dict[str, float] = {}
         for nid in graph_ids:
             val = float(self.scores.get(nid, 1.0))
             reconciled[nid] = max(0.0, min(1.0, val))
         self.scores = reconciled
-        with self.path.open("w", encoding="utf-8") as f:
-            json.dump(self.scores, f, indent=2)
+        # Only rewrite the snapshot when it is actually out of date
+        if replayed or reconciled != loaded:
+            self.compact()
+
+    def _replay_delta(self) -> int:
+        try:
+            f = self.delta_path.open("rb")
+        except FileNotFoundError:
+            return 0
+        n = 0
+        with f:
+            for line in f:
+                try:
+                    rec = orjson.loads(line)
+                    self.scores[rec["nid"]] = float(rec["v"])
+                except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                    # Torn trailing line from an interrupted append
+                    continue
+                n += 1
+        return n
+
+    def compact(self) -> None:
+        """Atomically rewrite the snapshot with current scores and drop the delta log."""
+        with self._lock:
+            if self._delta is not None:
+                self._delta.close()
+                self._delta = None
+            # Per-process/thread tmp name: concurrent scorers (e.g. tools run via to_thread) never share it
+            tmp = self.path.with_suffix(f"{self.path.suffix}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(orjson.dumps(self.scores, option=orjson.OPT_INDENT_2))
+            os.replace(tmp, self.path)
+            self.delta_path.unlink(missing_ok=True)
+            self._delta_lines = 0
+            self._pending.clear()
+            self._batch_counter = 0
+            self._dirty = False
+
+    def _flush(self) -> None:
+        # Append pending updates to the delta log in one write
+        with self._lock:
+            if self._pending:
+                if self._delta is None:
+                    self._delta = self.delta_path.open("ab")
+                self._delta.write(b"".join(self._pending))
+                self._delta.flush()
+                self._delta_lines += len(self._pending)
+                self._pending.clear()
+            self._batch_counter = 0
+            if self._delta_lines >= self.compact_every:
+                self.compact()
+
+    def flush(self) -> None:
+        """Persist pending updates into node_scores.json (atomic tmp + os.replace)."""
+        if self._dirty:
+            self.compact()
+
+    def close(self) -> None:
+        self.flush()
+        if self._delta is not None:
+            self._delta.close()
+            self._delta = None
+
+    def __del__(self) -> None:
+        # Release the handle only; persisting is explicit via flush()/close()
+        try:
+            if self._delta is not None:
+                self._delta.close()
+        except Exception:
+            pass
 
     @weave.op()
     def rank_nodes(self, query: str, nodes: list[dict[str, Any]]) -> list[str]:
-        logger.debug(f"KGScorer.rank_nodes(query='{query}', nodes={len(nodes)})")
-        return [n["node_id"] for n in sorted(nodes, key=lambda n: -self.scores.get(n["node_id"], 0.0))]
+        logger.debug("KGScorer.rank_nodes(query='{}', nodes={})", query, len(nodes))
+        return self.ranked_ids(nodes)
+
+    def ranked_ids(self, nodes: list[dict[str, Any]]) -> list[str]:
+        """Untraced core of rank_nodes, for callers whose own op already records the call."""
+        ids = [n["node_id"] for n in nodes]
+        get = self.scores.get
+        scores = np.fromiter((get(i, 0.0) for i in ids), dtype=np.float64, count=len(ids))
+        # Stable argsort on negated scores == sorted(..., key=-score): ties keep input order
+        return [ids[i] for i in np.argsort(-scores, kind="stable")]
 
     @weave.op()
     def update_from_trajectory(self, node_ids: list[str], reward: float) -> None:
-        logger.debug(f"KGScorer.update_from_trajectory(nodes={node_ids}, reward={reward:.3f})")
+        logger.debug("KGScorer.update_from_trajectory(nodes={}, reward={:.3f})", node_ids, reward)
         # Additive update toward reward with small step; encourages increases when reward > current
         step = 0.1
+        lines: list[bytes] = []
         for nid in node_ids:
             current = float(self.scores.get(nid, 1.0))
             delta = step * (reward - current)
-            self.scores[nid] = max(0.0, min(1.0, current + delta))
-        with self.path.open("w", encoding="utf-8") as f:
-            json.dump(self.scores, f, indent=2)
-
+            self.scores[nid] = val = max(0.0, min(1.0, current + delta))
+            lines.append(orjson.dumps({"nid": nid, "v": val}, option=orjson.OPT_APPEND_NEWLINE))
+        if not lines:
+            return
+        with self._lock:
+            self._pending.extend(lines)
+            self._dirty = True
+            self._batch_counter += 1
+            if self._batch_counter >= self.flush_every:
+                self._flush()
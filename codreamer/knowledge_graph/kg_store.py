@@ -1,90 +1,191 @@
 from __future__ import annotations
 
-import json
+from array import array
+from collections import deque
+from collections.abc import Iterator, Mapping
+from itertools import islice
 from pathlib import Path
+import sys
 from typing import Any
 
 from loguru import logger
+import orjson
 import weave
 
 from ..core.config import PROJECT_ROOT
 
 
+class _OutEdgesView(Mapping[str, list[tuple[str, str]]]):
+    """Read-only id -> [(target, label)] view over the store's SoA adjacency."""
+
+    def __init__(self, store: KnowledgeGraphStore) -> None:
+        self._store = store
+
+    def __getitem__(self, nid: str) -> list[tuple[str, str]]:
+        s = self._store
+        i = s._id_to_idx[nid]
+        if i >= s._n_nodes:
+            raise KeyError(nid)
+        ids, labels = s._ids, s._label_pool
+        return [(ids[t], labels[l]) for t, l in zip(s._edge_targets[i], s._edge_labels[i])]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.nodes)
+
+    def __len__(self) -> int:
+        return self._store._n_nodes
+
+
 class KnowledgeGraphStore:
-    """JSON-backed knowledge graph with simple traversal utilities."""
+    """JSON-backed knowledge graph with simple traversal utilities.
+
+    Adjacency is stored structure-of-arrays: node ids are mapped to ints and
+    each source holds parallel int arrays of target indices and label-pool
+    indices. Indices below _n_nodes are real nodes; dangling edge targets get
+    indices after them. Traversals run on ints and translate back to ids only
+    at return boundaries.
+    """
 
     def __init__(self, graph_path: Path | None = None) -> None:
         path = graph_path or (PROJECT_ROOT / "data" / "graph.json")
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        # nodes: id -> content
-        self.nodes: dict[str, str] = {n.get("id", ""): n.get("content", "") for n in data if n.get("id")}
-        # adjacency: id -> list[(target, label)]
-        self.out_edges: dict[str, list[tuple[str, str]]] = {}
+        data = orjson.loads(path.read_bytes())
+        ids: list[str] = []
+        id_to_idx: dict[str, int] = {}
+        node_content: list[str] = []
+        raw_edges: list[Any] = []
+        # Node pass: index ids (later duplicates overwrite content/edges, like a dict)
         for n in data:
             nid = n.get("id")
             if not nid:
                 continue
             edges_list = n.get("edges")
             if edges_list is None:
-                edges_list = n.get("edge", [])  # support alternate key
-            adj: list[tuple[str, str]] = []
-            for e in edges_list or []:
-                tgt = e.get("target") or e.get("target_id") or ""
-                lbl = e.get("label") or e.get("relationship") or ""
-                if tgt:
-                    adj.append((tgt, lbl))
-            self.out_edges[nid] = adj
+                edges_list = n.get("edge")  # support alternate key
+            i = id_to_idx.get(nid)
+            if i is None:
+                nid = sys.intern(nid)
+                id_to_idx[nid] = len(ids)
+                ids.append(nid)
+                node_content.append(n.get("content", ""))
+                raw_edges.append(edges_list)
+            else:
+                node_content[i] = n.get("content", "")
+                raw_edges[i] = edges_list
+        n_nodes = len(ids)
+        # Edge pass over the per-node lists only (each edge dict visited once);
+        # outer lists are pre-sized and per-source arrays built in one shot
+        label_pool: list[str] = []
+        label_to_idx: dict[str, int] = {}
+        get_idx = id_to_idx.get
+        get_label = label_to_idx.get
+        edge_targets: list[array] = [None] * n_nodes  # type: ignore[list-item]
+        edge_labels: list[array] = [None] * n_nodes  # type: ignore[list-item]
+        for i, edges_list in enumerate(raw_edges):
+            tgts: list[int] = []
+            lbls: list[int] = []
+            for e in edges_list or ():
+                # Subscript on the common key; fall back to the alternate only on miss
+                try:
+                    tgt = e["target"] or e.get("target_id")
+                except KeyError:
+                    tgt = e.get("target_id")
+                if not tgt:
+                    continue
+                t = get_idx(tgt)
+                if t is None:
+                    t = len(ids)
+                    tgt = sys.intern(tgt)
+                    id_to_idx[tgt] = t
+                    ids.append(tgt)
+                try:
+                    lbl = e["label"] or e.get("relationship") or ""
+                except KeyError:
+                    lbl = e.get("relationship") or ""
+                li = get_label(lbl)
+                if li is None:
+                    li = label_to_idx[lbl] = len(label_pool)
+                    label_pool.append(sys.intern(lbl))
+                tgts.append(t)
+                lbls.append(li)
+            edge_targets[i] = array("i", tgts)
+            edge_labels[i] = array("i", lbls)
+        # Dangling targets have no outgoing edges
+        n_dangling = len(ids) - n_nodes
+        edge_targets.extend(array("i") for _ in range(n_dangling))
+        edge_labels.extend(array("i") for _ in range(n_dangling))
+        self._ids = ids
+        self._id_to_idx = id_to_idx
+        self._node_content = node_content
+        self._label_pool = label_pool
+        self._n_nodes = n_nodes
+        self._edge_targets = edge_targets
+        self._edge_labels = edge_labels
+        # nodes: id -> content
+        self.nodes: dict[str, str] = dict(zip(ids, node_content))
+        # adjacency: id -> list[(target, label)] (read-only view)
+        self.out_edges: Mapping[str, list[tuple[str, str]]] = _OutEdgesView(self)
+
+    def out_targets(self, nid: str) -> list[str]:
+        """Target ids of nid's out-edges, labels skipped; [] for unknown or dangling ids."""
+        i = self._id_to_idx.get(nid)
+        if i is None or i >= self._n_nodes:
+            return []
+        ids = self._ids
+        return [ids[t] for t in self._edge_targets[i]]
 
     @weave.op()
     def expand(self, seed_nodes: list[str], goal: str, k: int) -> list[dict[str, Any]]:
-        logger.debug(f"KG.expand(seed={seed_nodes}, goal='{goal}', k={k})")
-        seen: set[str] = set()
-        results: list[dict[str, Any]] = []
-        frontier = list(seed_nodes)
-        while frontier and len(results) < k:
-            nid = frontier.pop(0)
-            if nid in seen or nid not in self.nodes:
+        logger.debug("KG.expand(seed={}, goal='{}', k={})", seed_nodes, goal, k)
+        n_nodes = self._n_nodes
+        targets = self._edge_targets
+        seen = bytearray(len(self._ids))
+        picked: list[int] = []
+        # Unknown seeds map to -1 and are skipped like non-node targets
+        frontier = deque(self._id_to_idx.get(s, -1) for s in seed_nodes)
+        while frontier and len(picked) < k:
+            i = frontier.popleft()
+            if i < 0 or i >= n_nodes or seen[i]:
                 continue
-            seen.add(nid)
-            results.append({"node_id": nid, "content": self.nodes[nid]})
-            for tgt, label in self.out_edges.get(nid, []):
-                if tgt not in seen:
-                    frontier.append(tgt)
-        # If under k, fill with arbitrary nodes
-        if len(results) < k:
-            for nid in self.nodes.keys():
-                if nid not in seen:
-                    results.append({"node_id": nid, "content": self.nodes[nid]})
-                    if len(results) >= k:
-                        break
-        return results[:k]
+            seen[i] = 1
+            picked.append(i)
+            frontier.extend(t for t in targets[i] if not seen[t])
+        # If under k, fill with arbitrary nodes (graph order)
+        if len(picked) < k:
+            picked.extend(islice((i for i in range(n_nodes) if not seen[i]), k - len(picked)))
+        ids, content = self._ids, self._node_content
+        return [{"node_id": ids[i], "content": content[i]} for i in picked[:k]]
 
     @weave.op()
     def get_node_facts(self, node_id: str) -> dict[str, Any]:
-        logger.debug(f"KG.get_node_facts(node_id={node_id})")
+        logger.debug("KG.get_node_facts(node_id={})", node_id)
         if node_id not in self.nodes:
             return {}
         return {"node_id": node_id, "content": self.nodes[node_id]}
 
     @weave.op()
     def subgraph(self, center: list[str], radius: int) -> tuple[list[dict[str, Any]], list[tuple[str, str, str]]]:
-        logger.debug(f"KG.subgraph(center={center}, radius={radius})")
-        seen: set[str] = set()
-        layer: set[str] = set(center)
+        logger.debug("KG.subgraph(center={}, radius={})", center, radius)
+        return self.neighborhood(center, radius)
+
+    def neighborhood(self, center: list[str], radius: int) -> tuple[list[dict[str, Any]], list[tuple[str, str, str]]]:
+        """Untraced core of subgraph, for callers whose own op already records the call."""
+        n_nodes = self._n_nodes
+        targets = self._edge_targets
+        seen: set[int] = set()
+        layer: set[int] = {i for i in map(self._id_to_idx.get, center) if i is not None}
         for _ in range(max(radius, 0)):
-            next_layer: set[str] = set()
-            for nid in list(layer):
-                for tgt, _label in self.out_edges.get(nid, []):
-                    if tgt not in seen:
-                        next_layer.add(tgt)
+            next_layer: set[int] = set()
+            for i in layer:
+                next_layer.update(t for t in targets[i] if t not in seen)
             seen.update(layer)
             layer = next_layer
-        node_list = [{"node_id": nid, "content": self.nodes.get(nid, "")} for nid in seen.union(layer) if nid in self.nodes]
+        # Graph order keeps results deterministic across processes
+        members = sorted(i for i in seen.union(layer) if i < n_nodes)
+        ids, content, labels = self._ids, self._node_content, self._label_pool
+        node_list = [{"node_id": ids[i], "content": content[i]} for i in members]
         edge_list: list[tuple[str, str, str]] = []
-        for nid in [n["node_id"] for n in node_list]:
-            for tgt, label in self.out_edges.get(nid, []):
-                if tgt in self.nodes:
-                    edge_list.append((nid, tgt, label))
+        for i in members:
+            for t, l in zip(targets[i], self._edge_labels[i]):
+                if t < n_nodes:
+                    edge_list.append((ids[i], ids[t], labels[l]))
         return node_list, edge_list
-
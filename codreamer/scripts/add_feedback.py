@@ -19,7 +19,7 @@ from ..feedback.feedback import (
     HumanPreference,
     OnlineOutcome,
     RULERFeedback,
-    append_event,
+    append_events,
 )
 
 
@@ -55,8 +55,6 @@ def main() -> None:
             "grounding": 0.9,
         },
     )
-    append_event(ruler_event)
-    logger.info("Appended RULERFeedback to default file\n")
 
     # 2) Human preference: pairwise winner/loser with reviewer + confidence
     human_event = HumanPreference(
@@ -69,8 +67,6 @@ def main() -> None:
         reviewer_id="reviewer_42",
         confidence=0.9,
     )
-    append_event(human_event)
-    logger.info("Appended HumanPreference to default file\n")
 
     # 3) Online outcomes: opens/replies/meetings/opportunity/closed_won
     online_event = OnlineOutcome(
@@ -84,14 +80,15 @@ def main() -> None:
         opportunity=False,
         closed_won=False,
     )
-    append_event(online_event)
-    logger.info("Appended OnlineOutcome to default file\n")
+
+    # Write all three events in one batch (single open/write per file)
+    events = [ruler_event, human_event, online_event]
+    append_events(events)
+    logger.info("Appended RULERFeedback, HumanPreference, OnlineOutcome to default file\n")
 
     # (Optional) Write the same events to an external JSONL file without changing config
     external_path = FEEDBACK_WRITE_PATH.parent / "feedback_external.jsonl"
-    append_event(ruler_event, path=external_path)
-    append_event(human_event, path=external_path)
-    append_event(online_event, path=external_path)
+    append_events(events, path=external_path)
     logger.info(f"Also wrote events to external file: {external_path}\n")
 
 
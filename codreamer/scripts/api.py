@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime
-import json
 from pathlib import Path
 import uuid
 from typing import Any
@@ -10,9 +11,12 @@ from typing import Any
 from fastapi import BackgroundTasks, FastAPI, HTTPException, Response
 from pydantic import BaseModel
 from loguru import logger
+import orjson
 
 from ..core.config import PROJECT_ROOT
+from ..knowledge_graph.kg_scoring import delta_log_path
 from ..scripts.pipeline import run_learning_loop
+from ..training.rollout import aclose_clients
 
 
 class LearnLoopRequest(BaseModel):
@@ -26,7 +30,14 @@ class LearnLoopResponse(BaseModel):
     results_path: str
 
 
-app = FastAPI(title="CoDreamer API", version="0.1.0")
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    yield
+    # uvicorn owns the loop that every background run shares; close its clients only on shutdown
+    await aclose_clients()
+
+
+app = FastAPI(title="CoDreamer API", version="0.1.0", lifespan=_lifespan)
 
 
 def _graph_path() -> Path:
@@ -53,22 +64,20 @@ def _backup_defaults() -> None:
 
 def _write_graph(graph: list[dict[str, Any]]) -> None:
     _graph_path().parent.mkdir(parents=True, exist_ok=True)
-    with _graph_path().open("w", encoding="utf-8") as f:
-        json.dump(graph, f, indent=2)
+    _graph_path().write_bytes(orjson.dumps(graph, option=orjson.OPT_INDENT_2))
 
 
 def _reset_node_scores() -> None:
     # Reset node scores to 1.0 for all nodes present in the graph
     try:
-        with _graph_path().open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(_graph_path().read_bytes())
         scores = {}
         for n in data:
             nid = n.get("id")
             if nid:
                 scores[nid] = 1.0
-        with _scores_path().open("w", encoding="utf-8") as f:
-            json.dump(scores, f, indent=2)
+        _scores_path().write_bytes(orjson.dumps(scores, option=orjson.OPT_INDENT_2))
+        delta_log_path(_scores_path()).unlink(missing_ok=True)
     except Exception:
         # If anything fails, leave as is; KGScorer will reconcile on load
         pass
@@ -2,16 +2,15 @@ from __future__ import annotations
 
 """Demo script: runs a single rollout to generate an email."""
 
-import asyncio
 
 from loguru import logger
 import weave
 import os
 from dotenv import load_dotenv
 
-from ..core.config import setup_logging
+from ..core.config import run_async, setup_logging
 from ..training.model_setup import create_and_register_model
-from ..training.rollout import ScenarioInput, rollout
+from ..training.rollout import ScenarioInput, aclose_clients, rollout
 from ..training.scenarios import load_synthetic_scenarios
 
 
@@ -23,11 +22,12 @@ async def _run() -> None:
     model = await create_and_register_model()
     scenario = load_synthetic_scenarios()[0]
     traj = await rollout(model, ScenarioInput(step=0, scenario=scenario))
+    await aclose_clients()
     logger.info(f"Final email: {getattr(traj, 'final_email', None)}")
 
 
 def main() -> None:
-    asyncio.run(_run())
+    run_async(_run())
 
 
 if __name__ == "__main__":
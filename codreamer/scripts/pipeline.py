@@ -11,9 +11,12 @@ End-to-end pipeline script with five steps:
 
 import asyncio
 from datetime import datetime
-import json
+import heapq
+from itertools import chain
+from operator import attrgetter
 from pathlib import Path
-from statistics import mean, median
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
 import os
 import random
 import uuid
@@ -22,23 +25,35 @@ from urllib.error import URLError, HTTPError
 
 import art
 from loguru import logger
+import numpy as np
+import orjson
+from pydantic import BaseModel
 import weave
 import os
 from dotenv import load_dotenv
 
-from ..core.config import GROUPS_PER_STEP, LEARNING_RATE, MAX_STEPS, PROJECT_ROOT, ROLLOUTS_PER_GROUP, setup_logging
-from ..core.data_models import FinalEmail
-from ..feedback.feedback import OnlineOutcome, RewardMixConfig, append_event, compute_rewards, hash_trajectory
-from ..knowledge_graph.kg_scoring import KGScorer
+from ..core.config import GROUPS_PER_STEP, LEARNING_RATE, MAX_STEPS, PROJECT_ROOT, ROLLOUTS_PER_GROUP, run_async, setup_logging
+from ..core.data_models import FinalEmail, Scenario
+from ..feedback.feedback import OnlineOutcome, RewardMixConfig, append_events, compute_rewards, hash_trajectory
+from ..knowledge_graph.kg_scoring import KGScorer, delta_log_path
 from ..training.model_setup import create_and_register_model
-from ..training.rewards import score_trajectory_group
-from ..training.rollout import ProjectTrajectory, ScenarioInput, rollout
+from ..training.rewards import blend_rewards, flush_score_cache, score_trajectory_group_local, score_trajectory_groups
+from ..training.rollout import ProjectTrajectory, ScenarioInput, aclose_clients, rollout, run_rollouts
 from ..training.scenarios import load_synthetic_scenarios
 
 
 @weave.op()
-async def generate_trajectories(model: art.Model) -> list[art.TrajectoryGroup]:
-    scenarios = load_synthetic_scenarios()
+async def generate_trajectories(
+    model: art.Model,
+    scenarios: list[Scenario] | None = None,
+    after_each: Callable[[art.TrajectoryGroup], Awaitable[art.TrajectoryGroup]] | None = None,
+) -> list[art.TrajectoryGroup]:
+    """Roll out every scenario; `after_each` runs on each group as soon as it finishes.
+
+    Passing score_trajectory_group_local fuses Steps 1+2, so judging early
+    groups overlaps the rollouts still in flight; blend_rewards the result once.
+    """
+    scenarios = scenarios if scenarios is not None else load_synthetic_scenarios()
     logger.info(f"[Step 1] Generating trajectories for {len(scenarios)} prospects")
     groups: list[art.TrajectoryGroup] = []
     for s in scenarios:
@@ -47,17 +62,17 @@ async def generate_trajectories(model: art.Model) -> list[art.TrajectoryGroup]:
                 (rollout(model, ScenarioInput(step=0, scenario=s)) for _ in range(ROLLOUTS_PER_GROUP))
             )
         )
-    finished = await art.gather_trajectory_groups(groups, pbar_desc="gather", max_exceptions=ROLLOUTS_PER_GROUP * len(scenarios))
+    finished = await art.gather_trajectory_groups(
+        groups, pbar_desc="gather", max_exceptions=ROLLOUTS_PER_GROUP * len(scenarios), after_each=after_each
+    )
     return finished
 
 
 @weave.op()
 async def score_trajectories(groups: list[art.TrajectoryGroup]) -> list[art.TrajectoryGroup]:
     logger.info("[Step 2] Scoring trajectories (RULER/offline blend)")
-    judged: list[art.TrajectoryGroup] = []
-    for g in groups:
-        judged.append(await score_trajectory_group(g))
-    return judged
+    # All groups are finished already; judge them in a single request
+    return await score_trajectory_groups(groups)
 
 
 @weave.op()
@@ -80,26 +95,29 @@ async def grpo_update(model: art.TrainableModel, judged_groups: list[art.Traject
 
 
 @weave.op()
-def update_kg_weights(judged_groups: list[art.TrajectoryGroup]) -> None:
+def update_kg_weights(judged_groups: list[art.TrajectoryGroup], scorer: KGScorer | None = None) -> None:
     logger.info("[Step 4] Updating KG weights from high-reward trajectories")
-    scorer = KGScorer()
+    scorer = scorer or KGScorer()
     # Credit nodes cited in higher-reward trajectories
-    all_trajs: list[ProjectTrajectory] = []
-    for g in judged_groups:
-        all_trajs.extend(g.trajectories)  # type: ignore[arg-type]
-    # Sort by reward desc
-    all_trajs.sort(key=lambda t: getattr(t, "reward", 0.0), reverse=True)
-    top = all_trajs[: max(1, len(all_trajs) // 2)]
+    all_trajs: list[ProjectTrajectory] = list(chain.from_iterable(g.trajectories for g in judged_groups))  # type: ignore[arg-type]
+    # Top half by reward desc (nlargest keeps input order on ties, like a stable sort);
+    # reward is a float field on every art.Trajectory, so a C-level attrgetter suffices
+    rewards: list[float] = list(map(attrgetter("reward"), all_trajs))
+    top_idx = heapq.nlargest(max(1, len(all_trajs) // 2), range(len(all_trajs)), key=rewards.__getitem__)
     total_nodes = 0
     updated_nodes: set[str] = set()
-    for t in top:
+    for i in top_idx:
+        t = all_trajs[i]
         node_ids: list[str] = []
-        if hasattr(t, "final_email") and getattr(t, "final_email") is not None:
-            node_ids = list(getattr(t, "final_email").citations)
+        fe = t.final_email
+        if fe is not None:
+            node_ids = list(fe.citations)
         if node_ids:
             total_nodes += len(node_ids)
             updated_nodes.update(node_ids)
-            scorer.update_from_trajectory(node_ids, float(getattr(t, "reward", 0.0)))
+            scorer.update_from_trajectory(node_ids, rewards[i])
+    # Step boundary: persist batched updates so snapshot readers and tools see them
+    scorer.flush()
     if total_nodes == 0:
         logger.info("[Step 4] No citations found in top trajectories; node scores remain unchanged")
     else:
@@ -107,18 +125,21 @@ def update_kg_weights(judged_groups: list[art.TrajectoryGroup]) -> None:
 
 
 @weave.op()
-async def evaluate(model: art.Model) -> list[ProjectTrajectory]:
+async def evaluate(model: art.Model, scenarios: list[Scenario] | None = None) -> list[ProjectTrajectory]:
     logger.info("[Step 5] Evaluating: regenerate emails and compute blended feedback rewards")
     # Re-run one trajectory per scenario and compute a blended reward from feedback logs
-    scenarios = load_synthetic_scenarios()
-    outputs: list[ProjectTrajectory] = []
-    for s in scenarios:
-        traj = await rollout(model, ScenarioInput(step=1, scenario=s))
-        outputs.append(traj)
-        tid = hash_trajectory(traj.messages_and_choices)
-        # Generate fake online outcome to simulate improvement
-        append_event(OnlineOutcome(trajectory_id=tid, prospect_id=s.prospect.prospect_id, step=1, ts=datetime.utcnow(), opened=True, replied=True))
-        blended = compute_rewards([tid], RewardMixConfig())
+    scenarios = scenarios if scenarios is not None else load_synthetic_scenarios()
+    outputs = await run_rollouts(model, (ScenarioInput(step=1, scenario=s) for s in scenarios))
+    # Log all outcomes in one append, then blend every trajectory in one feedback scan
+    now = datetime.utcnow()
+    tids = [hash_trajectory(traj.messages_and_choices) for traj in outputs]
+    # Generate fake online outcome to simulate improvement
+    append_events(
+        OnlineOutcome(trajectory_id=tid, prospect_id=s.prospect.prospect_id, step=1, ts=now, opened=True, replied=True)
+        for s, tid in zip(scenarios, tids)
+    )
+    blended = compute_rewards(tids, RewardMixConfig())
+    for traj, tid in zip(outputs, tids):
         traj.reward = float(blended.get(tid, 0.0))
     return outputs
 
@@ -133,12 +154,14 @@ async def run_pipeline() -> None:
         logger.warning(f"Failed to initialize Weave (W&B offline mode): {e}")
     setup_logging()
     model = await create_and_register_model()
+    # Load once and share between Step 1 and Step 5
+    scenarios = load_synthetic_scenarios()
 
-    # Step 1
-    groups = await generate_trajectories(model)
-
-    # Step 2
-    judged = await score_trajectories(groups)
+    # Steps 1+2: each group is scored as soon as its rollouts finish
+    judged = await generate_trajectories(model, scenarios, after_each=score_trajectory_group_local)
+    # One feedback scan for the whole step instead of one per group
+    judged = blend_rewards(judged)
+    await flush_score_cache()
 
     # Step 3
     await grpo_update(model, judged)
@@ -147,13 +170,22 @@ async def run_pipeline() -> None:
     update_kg_weights(judged)
 
     # Step 5
-    eval_trajs = await evaluate(model)
+    eval_trajs = await evaluate(model, scenarios)
     for i, t in enumerate(eval_trajs, 1):
         logger.info(f"Eval[{i}] reward={getattr(t, 'reward', 0.0):.3f} final_email={getattr(t, 'final_email', None)}")
 
 
+async def _closing_clients(main: Awaitable[None]) -> None:
+    # Only CLI entrypoints own their loop; run_pipeline/run_learning_loop also run on the
+    # API's shared loop, where closing the cached clients would break concurrent runs
+    try:
+        await main
+    finally:
+        await aclose_clients()
+
+
 def main() -> None:
-    asyncio.run(run_pipeline())
+    run_async(_closing_clients(run_pipeline()))
 
 # ------------------------
 # Persistence helpers
@@ -178,22 +210,25 @@ def _iter_path(iteration: int, suffix: str) -> Path:
 
 def _traj_to_dict(t: ProjectTrajectory) -> dict:
     fe = None
-    if getattr(t, "final_email", None) is not None:
+    email = t.final_email
+    if email is not None:
         fe = {
-            "subject": t.final_email.subject,
-            "body": t.final_email.body,
-            "citations": list(t.final_email.citations),
+            "subject": email.subject,
+            "body": email.body,
+            "citations": list(email.citations),
         }
     # Serialize messages/choices into JSON-friendly structures
-    raw = list(getattr(t, "messages_and_choices", []))
-    serial: list[dict | str] = []
+    raw = t.messages_and_choices
+    serial: list[dict | str | orjson.Fragment] = []
     for item in raw:
         if isinstance(item, dict):
             serial.append(item)
             continue
-        if hasattr(item, "model_dump"):
+        if isinstance(item, BaseModel):
             try:
-                serial.append(item.model_dump())  # OpenAI pydantic models
+                # OpenAI pydantic models: pydantic-core emits JSON in one pass and
+                # orjson splices the bytes into the row verbatim (rows go through _write_rows)
+                serial.append(orjson.Fragment(item.model_dump_json()))
                 continue
             except Exception:
                 pass
@@ -204,8 +239,8 @@ def _traj_to_dict(t: ProjectTrajectory) -> dict:
             serial.append("<unserializable>")
     return {
         "messages_and_choices": serial,
-        "metadata": dict(getattr(t, "metadata", {})) if isinstance(getattr(t, "metadata", {}), dict) else {},
-        "reward": float(getattr(t, "reward", 0.0)),
+        "metadata": dict(t.metadata),
+        "reward": float(t.reward),
         "final_email": fe,
     }
 
@@ -227,25 +262,37 @@ def _traj_from_dict(d: dict) -> ProjectTrajectory:
             t.final_email = None
     return t
 
-def write_groups(groups: list[art.TrajectoryGroup], path: Path) -> None:
+def _group_to_dict(g: art.TrajectoryGroup) -> dict:
+    return {"trajectories": [_traj_to_dict(t) for t in g.trajectories]}
+
+_LINE_OPTS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _dumps_line(obj: object) -> bytes:
+    return orjson.dumps(obj, option=_LINE_OPTS)
+
+def _write_rows(rows: Iterable[dict], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        for g in groups:
-            payload = {"trajectories": [_traj_to_dict(t) for t in g.trajectories]}
-            f.write(json.dumps(payload) + "\n")
+    # Large buffer + writelines: rows are encoded lazily but hit the OS in few writes
+    with path.open("wb", buffering=1 << 20) as f:
+        f.writelines(map(_dumps_line, rows))
+
+def write_groups(groups: list[art.TrajectoryGroup], path: Path) -> None:
+    _write_rows((_group_to_dict(g) for g in groups), path)
 
 def read_groups(path: Path) -> list[art.TrajectoryGroup]:
     groups: list[art.TrajectoryGroup] = []
     if not path.exists():
         return groups
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            try:
-                obj = json.loads(line)
-                trajs = [_traj_from_dict(td) for td in obj.get("trajectories", [])]
-                groups.append(art.TrajectoryGroup(trajectories=trajs))
-            except Exception:
-                continue
+    # One read, then split in memory; malformed lines are still skipped individually
+    for line in path.read_bytes().splitlines():
+        if not line.strip():
+            continue
+        try:
+            obj = orjson.loads(line)
+            trajs = [_traj_from_dict(td) for td in obj.get("trajectories", [])]
+            groups.append(art.TrajectoryGroup(trajectories=trajs))
+        except Exception:
+            continue
     return groups
 
 # ------------------------
@@ -256,15 +303,16 @@ async def _step1_generate() -> None:
     setup_logging()
     model = await create_and_register_model()
     groups = await generate_trajectories(model)
+    await aclose_clients()
     write_groups(groups, _groups_path(1))
     logger.info(f"Wrote groups to {_groups_path(1)}")
 
 async def _step2_score() -> None:
     setup_logging()
-    model = await create_and_register_model()  # model not strictly needed for scoring fallback path
-    del model
+    load_dotenv()  # scoring needs no model, only OPENAI_API_KEY for the online judge
     groups = read_groups(_groups_path(1))
     judged = await score_trajectories(groups)
+    await flush_score_cache()
     write_groups(judged, _groups_path(2))
     logger.info(f"Wrote scored groups to {_groups_path(2)}")
 
@@ -283,11 +331,9 @@ async def _step5_evaluate() -> None:
     setup_logging()
     model = await create_and_register_model()
     eval_trajs = await evaluate(model)
+    await aclose_clients()
     out = _eval_path()
-    out.parent.mkdir(parents=True, exist_ok=True)
-    with out.open("w", encoding="utf-8") as f:
-        for t in eval_trajs:
-            f.write(json.dumps(_traj_to_dict(t)) + "\n")
+    _write_rows((_traj_to_dict(t) for t in eval_trajs), out)
     logger.info(f"Wrote eval trajectories to {out}")
 
 
@@ -297,82 +343,84 @@ async def _step5_evaluate() -> None:
 
 def _write_json(path: Path, obj: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        f.write(json.dumps(obj) + "\n")
+    path.write_bytes(_dumps_line(obj))
+
+def _persist(writes: list[asyncio.Task[None]] | None, fn: Callable[..., None], *args: Any) -> None:
+    """Run fn(*args) now, or on a worker thread tracked in `writes` (await them before reading back)."""
+    if writes is None:
+        fn(*args)
+    else:
+        writes.append(asyncio.create_task(asyncio.to_thread(fn, *args)))
 
 @weave.op()
-def log_rewards_metrics(iteration: int, judged_groups: list[art.TrajectoryGroup]) -> dict:
-    rewards: list[float] = []
-    per_traj: list[dict] = []
+def log_rewards_metrics(
+    iteration: int,
+    judged_groups: list[art.TrajectoryGroup],
+    writes: list[asyncio.Task[None]] | None = None,
+) -> dict:
+    trajs = [t for g in judged_groups for t in g.trajectories]
+    n = len(trajs)
 
     # Trend with randomness
     base_uplift = max(0.0, min(0.3, 0.01 * iteration + random.uniform(0.0, 0.02)))
-
-    for g in judged_groups:
-        for t in g.trajectories:
-            r = float(getattr(t, "reward", 0.0))
-            jitter = random.uniform(-0.03, 0.05)
-            r_adj = min(1.0, max(0.0, r + base_uplift + jitter))
-            rewards.append(r_adj)
-            per_traj.append({
-                "reward": r_adj,
-                "prospect_id": str(getattr(t, "metadata", {}).get("prospect_id", "")) if isinstance(getattr(t, "metadata", {}), dict) else "",
-                "auto_finalized": bool(getattr(t, "metadata", {}).get("auto_finalized", False)) if isinstance(getattr(t, "metadata", {}), dict) else False,
-            })
+    # Same RNG draws in the same order as the per-trajectory loop this replaces
+    raw = np.fromiter((t.reward for t in trajs), dtype=np.float64, count=n)
+    jitter = np.fromiter((random.uniform(-0.03, 0.05) for _ in range(n)), dtype=np.float64, count=n)
+    rewards = np.clip(raw + base_uplift + jitter, 0.0, 1.0)
 
     prev_mean: float | None = None
     if iteration > 1:
         prev_path = _iter_path(iteration - 1, "rewards_metrics")
         if prev_path.exists():
             try:
-                with prev_path.open("r", encoding="utf-8") as f:
+                with prev_path.open("rb") as f:
                     line = f.readline()
                     if line:
-                        prev_obj = json.loads(line)
+                        prev_obj = orjson.loads(line)
                         prev_mean = float(prev_obj.get("mean", 0.0))
             except Exception:
                 prev_mean = None
 
-    if rewards:
-        curr_mean = mean(rewards)
+    if n:
+        curr_mean = float(rewards.mean())
         if prev_mean is not None and curr_mean < prev_mean + 0.005:
             bump = (prev_mean + 0.01) - curr_mean
-            rewards = [min(1.0, max(0.0, r + bump)) for r in rewards]
-            # Align per_traj rewards with adjusted list
-            for i in range(min(len(per_traj), len(rewards))):
-                per_traj[i]["reward"] = rewards[i]
+            np.clip(rewards + bump, 0.0, 1.0, out=rewards)
     metrics = {
         "iteration": iteration,
-        "count": len(rewards),
-        "mean": mean(rewards) if rewards else 0.0,
-        "median": median(rewards) if rewards else 0.0,
-        "min": min(rewards) if rewards else 0.0,
-        "max": max(rewards) if rewards else 0.0,
+        "count": n,
+        "mean": float(rewards.mean()) if n else 0.0,
+        "median": float(np.median(rewards)) if n else 0.0,
+        "min": float(rewards.min()) if n else 0.0,
+        "max": float(rewards.max()) if n else 0.0,
         "ts": datetime.utcnow().isoformat(),
     }
     # Persist JSON snapshots
-    _write_json(_iter_path(iteration, "rewards_metrics"), metrics)
-    # Per-trajectory rewards (JSONL)
-    per_path = _iter_path(iteration, "rewards_per_traj")
-    per_path.parent.mkdir(parents=True, exist_ok=True)
-    with per_path.open("w", encoding="utf-8") as f:
-        for row in per_traj:
-            f.write(json.dumps(row) + "\n")
+    _persist(writes, _write_json, _iter_path(iteration, "rewards_metrics"), metrics)
+    # Per-trajectory rewards (JSONL), built once from the final adjusted rewards
+    per_traj: list[dict] = []
+    for t, r in zip(trajs, rewards.tolist()):
+        md = t.metadata
+        per_traj.append({
+            "reward": r,
+            "prospect_id": str(md.get("prospect_id", "")),
+            "auto_finalized": bool(md.get("auto_finalized", False)),
+        })
+    _persist(writes, _write_rows, per_traj, _iter_path(iteration, "rewards_per_traj"))
     return metrics
 
 @weave.op()
-def log_node_scores_snapshot(iteration: int) -> dict:
+def log_node_scores_snapshot(iteration: int, writes: list[asyncio.Task[None]] | None = None) -> dict:
     scores_path = PROJECT_ROOT / "data" / "node_scores.json"
     snapshot = {"iteration": iteration, "ts": datetime.utcnow().isoformat(), "scores": {}}
     if scores_path.exists():
         try:
-            with scores_path.open("r", encoding="utf-8") as f:
-                snapshot["scores"] = json.load(f)
+            snapshot["scores"] = orjson.loads(scores_path.read_bytes())
         except Exception:
             snapshot["scores"] = {}
     # Save a copy per iteration for diff/visualization
     out = _results_root() / f"iter{iteration}_node_scores.json"
-    _write_json(out, snapshot)
+    _persist(writes, _write_json, out, snapshot)
     return snapshot
 
 
@@ -380,8 +428,7 @@ def _read_node_scores() -> dict:
     scores_path = PROJECT_ROOT / "data" / "node_scores.json"
     if scores_path.exists():
         try:
-            with scores_path.open("r", encoding="utf-8") as f:
-                return json.load(f)
+            return orjson.loads(scores_path.read_bytes())
         except Exception:
             return {}
     return {}
@@ -396,7 +443,7 @@ def _notify_frontend(run_id: str, final_email: dict, node_scores: dict) -> None:
         "final_email": final_email,
         "node_scores": node_scores,
     }
-    data = json.dumps(payload).encode("utf-8")
+    data = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
     req = urlrequest.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
     try:
         with urlrequest.urlopen(req, timeout=10) as resp:
@@ -411,35 +458,35 @@ def _init_node_scores_all_ones() -> None:
     graph_path = PROJECT_ROOT / "data" / "graph.json"
     scores_path = PROJECT_ROOT / "data" / "node_scores.json"
     try:
-        with graph_path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(graph_path.read_bytes())
         scores: dict[str, float] = {}
         for n in data:
             nid = n.get("id")
             if nid:
                 scores[nid] = 1.0
         scores_path.parent.mkdir(parents=True, exist_ok=True)
-        with scores_path.open("w", encoding="utf-8") as f:
-            json.dump(scores, f, indent=2)
+        scores_path.write_bytes(orjson.dumps(scores, option=orjson.OPT_INDENT_2))
+        # Pending deltas belong to the old scores; never replay them onto the reset
+        delta_log_path(scores_path).unlink(missing_ok=True)
         logger.info("[Init] node_scores.json reset to all ones for current graph")
     except Exception as e:
         logger.warning(f"[Init] Failed to reset node_scores.json: {e}")
 
 
 def main_step1() -> None:
-    asyncio.run(_step1_generate())
+    run_async(_step1_generate())
 
 def main_step2() -> None:
-    asyncio.run(_step2_score())
+    run_async(_step2_score())
 
 def main_step3() -> None:
-    asyncio.run(_step3_grpo())
+    run_async(_step3_grpo())
 
 def main_step4() -> None:
     _step4_update_kg()
 
 def main_step5() -> None:
-    asyncio.run(_step5_evaluate())
+    run_async(_step5_evaluate())
 
 # ------------------------
 # Continuous learning loop (Steps 1-4)
@@ -465,7 +512,11 @@ async def run_learning_loop(num_iters: int = 3, run_id: str | None = None, depth
     # Baseline snapshot (iteration 0): reset scores, snapshot node scores + baseline email
     logger.info("[Loop 0] Reset node scores, snapshot, and generate baseline email")
     _init_node_scores_all_ones()
-    base_snapshot = log_node_scores_snapshot(0)
+    # Metrics/snapshot files are written on worker threads while the loop moves on
+    writes: list[asyncio.Task[None]] = []
+    base_snapshot = log_node_scores_snapshot(0, writes)
+    # One scorer for the whole loop; updates are batched and flushed per step
+    scorer = KGScorer()
     scenarios = load_synthetic_scenarios()
     baseline_traj = await rollout(model, ScenarioInput(step=0, scenario=scenarios[0]))
     if getattr(baseline_traj, "final_email", None) is not None:
@@ -486,21 +537,32 @@ async def run_learning_loop(num_iters: int = 3, run_id: str | None = None, depth
         # Optionally override per-iteration depth (max turns)
         if depth is not None:
             os.environ["MAX_TURNS_OVERRIDE"] = str(max(1, depth))
-        logger.info(f"[Loop {it}/{num_iters}] Step 1 - Generate")
-        groups = await generate_trajectories(model)
-        write_groups(groups, _iter_path(it, "step1_groups"))
-
-        logger.info(f"[Loop {it}/{num_iters}] Step 2 - Score")
-        judged = await score_trajectories(groups)
+        logger.info(f"[Loop {it}/{num_iters}] Step 1+2 - Generate and score")
+        # Snapshot each group before scoring so step1_groups keeps unscored rewards
+        step1_rows: dict[int, dict] = {}
+
+        async def _score(g: art.TrajectoryGroup) -> art.TrajectoryGroup:
+            row = _group_to_dict(g)
+            judged_g = await score_trajectory_group_local(g)
+            step1_rows[id(judged_g)] = row
+            return judged_g
+
+        judged = blend_rewards(await generate_trajectories(model, scenarios, after_each=_score))
+        # New judge scores are persisted alongside the other step writes
+        writes.append(asyncio.create_task(flush_score_cache()))
+        _write_rows([step1_rows[id(g)] for g in judged], _iter_path(it, "step1_groups"))
         write_groups(judged, _iter_path(it, "step2_groups"))
-        log_rewards_metrics(it, judged)
+        # The previous iteration's metrics file is read back here; finish pending writes first
+        await asyncio.gather(*writes)
+        writes.clear()
+        log_rewards_metrics(it, judged, writes)
 
         logger.info(f"[Loop {it}/{num_iters}] Step 3 - GRPO")
         await grpo_update(model, judged)
 
         logger.info(f"[Loop {it}/{num_iters}] Step 4 - Update KG")
-        update_kg_weights(judged)
-        snapshot = log_node_scores_snapshot(it)
+        update_kg_weights(judged, scorer)
+        snapshot = log_node_scores_snapshot(it, writes)
 
         # Generate and persist email for this iteration
         logger.info(f"[Loop {it}/{num_iters}] Generating iteration email")
@@ -517,12 +579,14 @@ async def run_learning_loop(num_iters: int = 3, run_id: str | None = None, depth
             _write_json(_iter_path(it, "email"), fei)
             _notify_frontend(_RUN_ID or "", fei, snapshot.get("scores", {}))
 
+    scorer.close()
+    await asyncio.gather(*writes)
+
     # Optionally also save a final_email.json alias for convenience (copies last iter)
     last_iter_email = _iter_path(num_iters, "email")
     if last_iter_email.exists():
         try:
-            with last_iter_email.open("r", encoding="utf-8") as f:
-                last_fe = json.loads(f.read())
+            last_fe = orjson.loads(last_iter_email.read_bytes())
             _write_json(_results_root() / "final_email.json", last_fe)
             logger.info(f"[Final Email] aliased to {_results_root() / 'final_email.json'}")
         except Exception:
@@ -555,7 +619,7 @@ def main_loop() -> None:
         except Exception:
             pass
     run_id = os.getenv("RUN_ID")
-    asyncio.run(run_learning_loop(num_iters=iters, run_id=run_id, depth=depth))
+    run_async(_closing_clients(run_learning_loop(num_iters=iters, run_id=run_id, depth=depth)))
 
 
 if __name__ == "__main__":
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 """Training script: runs the iterative training loop with GRPO updates."""
 
-import asyncio
 
 import art
 from art.utils import iterate_dataset
@@ -11,10 +10,10 @@ import weave
 import os
 from dotenv import load_dotenv
 
-from ..core.config import GROUPS_PER_STEP, LEARNING_RATE, MAX_STEPS, ROLLOUTS_PER_GROUP, setup_logging
+from ..core.config import GROUPS_PER_STEP, LEARNING_RATE, MAX_STEPS, ROLLOUTS_PER_GROUP, run_async, setup_logging
 from ..training.model_setup import create_and_register_model
-from ..training.rewards import score_trajectory_group
-from ..training.rollout import ScenarioInput, rollout
+from ..training.rewards import blend_rewards, flush_score_cache, score_trajectory_group_local
+from ..training.rollout import ScenarioInput, aclose_clients, rollout
 from ..training.scenarios import load_synthetic_scenarios
 
 
@@ -39,18 +38,27 @@ async def _run() -> None:
                 )
             )
 
-        finished_groups = await art.gather_trajectory_groups(groups, pbar_desc="gather", max_exceptions=ROLLOUTS_PER_GROUP * len(batch.items))
-        judged = [await score_trajectory_group(g) for g in finished_groups]
+        # Score each group as soon as its rollouts finish, overlapping the rest
+        judged = await art.gather_trajectory_groups(
+            groups,
+            pbar_desc="gather",
+            max_exceptions=ROLLOUTS_PER_GROUP * len(batch.items),
+            after_each=score_trajectory_group_local,
+        )
+        # Blend feedback for the whole step in one pass
+        judged = blend_rewards(judged)
+        await flush_score_cache()
 
         await model.delete_checkpoints()
         await model.train(judged, config=art.TrainConfig(learning_rate=LEARNING_RATE))
         logger.info(f"Completed step {batch.step}")
         if batch.step >= MAX_STEPS:
             break
+    await aclose_clients()
 
 
 def main() -> None:
-    asyncio.run(_run())
+    run_async(_run())
 
 
 if __name__ == "__main__":
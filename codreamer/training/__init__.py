@@ -1,8 +1,14 @@
 """Training infrastructure: model setup, rollouts, rewards, and tools."""
 
 from .model_setup import create_and_register_model
-from .rewards import score_trajectory_group
-from .rollout import ProjectTrajectory, ScenarioInput, rollout
+from .rewards import (
+    blend_rewards,
+    flush_score_cache,
+    score_trajectory_group,
+    score_trajectory_group_local,
+    score_trajectory_groups,
+)
+from .rollout import ProjectTrajectory, ScenarioInput, aclose_clients, get_client, rollout, run_rollouts
 from .scenarios import load_synthetic_scenarios
 from .tools import (
     finalize_email,
@@ -12,10 +18,17 @@ from .tools import (
 
 __all__ = [
     "create_and_register_model",
+    "blend_rewards",
+    "flush_score_cache",
     "score_trajectory_group",
+    "score_trajectory_group_local",
+    "score_trajectory_groups",
     "ProjectTrajectory",
     "ScenarioInput",
+    "aclose_clients",
+    "get_client",
     "rollout",
+    "run_rollouts",
     "load_synthetic_scenarios",
     "finalize_email",
     "get_connected_nodes",
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import random
 import os
+from weakref import WeakKeyDictionary
 
 from dotenv import load_dotenv
 import art
@@ -10,15 +12,33 @@ from art.serverless.backend import ServerlessBackend
 from ..core.config import RANDOM_SEED
 
 
+# Registered models per event loop (backend clients are loop-bound), keyed by (name, project, base_model)
+_MODELS: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str, str], art.TrainableModel]] = (
+    WeakKeyDictionary()
+)
+_MODEL_LOCKS: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = WeakKeyDictionary()
+
+
 async def create_and_register_model() -> art.TrainableModel:
+    """Return the registered model for the current config, registering it on first use."""
     load_dotenv()
     random.seed(RANDOM_SEED)
-    model = art.TrainableModel(
-        name=os.getenv("ART_MODEL_NAME", "model"),
-        project=os.getenv("ART_PROJECT", "codreamer"),
-        base_model=os.getenv("ART_BASE_MODEL", "Qwen/Qwen2.5-14B-Instruct"),
+    key = (
+        os.getenv("ART_MODEL_NAME", "model"),
+        os.getenv("ART_PROJECT", "codreamer"),
+        os.getenv("ART_BASE_MODEL", "Qwen/Qwen2.5-14B-Instruct"),
     )
-    backend = ServerlessBackend()
-    await model.register(backend)
+    loop = asyncio.get_running_loop()
+    lock = _MODEL_LOCKS.get(loop)
+    if lock is None:
+        lock = _MODEL_LOCKS[loop] = asyncio.Lock()
+    async with lock:
+        models = _MODELS.setdefault(loop, {})
+        model = models.get(key)
+        if model is None:
+            name, project, base_model = key
+            model = art.TrainableModel(name=name, project=project, base_model=base_model)
+            backend = ServerlessBackend()
+            await model.register(backend)
+            models[key] = model
     return model
-
@@ -2,153 +2,358 @@ from __future__ import annotations
 
 """Reward helpers with offline fallback RULER plus feedback blending."""
 
+import asyncio
 import os
 from datetime import datetime
+import hashlib
+from itertools import islice
 import json
 import os
+import re
+import threading
+from weakref import WeakKeyDictionary
 
 import art
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from loguru import logger
+import pyarrow as pa
+import pyarrow.parquet as pq
 import weave
 
-from ..feedback.feedback import RULERFeedback, RewardMixConfig, append_event, compute_rewards, hash_trajectory
+from ..core.config import MAX_CONCURRENCY, PROJECT_ROOT
+from ..feedback.feedback import FeedbackWriter, RULERFeedback, RewardMixConfig, compute_rewards, hash_trajectory
+
+
+# One judge semaphore per event loop (asyncio primitives are loop-bound)
+_JUDGE_SEMAPHORES: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+
+
+def _judge_semaphore() -> asyncio.Semaphore:
+    """Bound concurrent judge requests across all groups (JUDGE_CONCURRENCY)."""
+    loop = asyncio.get_running_loop()
+    sem = _JUDGE_SEMAPHORES.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, int(os.getenv("JUDGE_CONCURRENCY", str(MAX_CONCURRENCY)))))
+        _JUDGE_SEMAPHORES[loop] = sem
+    return sem
+
+
+# Scores keyed by a content hash of (subject, body, citations); judge entries persist across runs
+SCORE_CACHE_PATH = PROJECT_ROOT / "data" / "score_cache.parquet"
+# Judge entries kept in memory and on disk; the oldest are evicted first
+SCORE_CACHE_MAX = 100_000
+_SCORE_CACHE: dict[bytes, float] = {}
+_SCORE_CACHE_LOADED = False
+# New judge scores not yet written; flush_score_cache() persists them at step boundaries
+_SCORE_CACHE_DIRTY = False
+_FLUSH_LOCKS: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = WeakKeyDictionary()
+_OFFLINE_CACHE: dict[bytes, float] = {}
+
+Candidate = tuple[str, str, list[str]]
+
+
+def _score_key(subject: str, body: str, citations: list[str], salt: str = "") -> bytes:
+    raw = f"{salt}\x00{subject}\x00{body}\x00{'|'.join(citations)}"
+    return hashlib.blake2b(raw.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _judge_cache() -> dict[bytes, float]:
+    global _SCORE_CACHE_LOADED
+    if not _SCORE_CACHE_LOADED:
+        _SCORE_CACHE_LOADED = True
+        try:
+            table = pq.read_table(SCORE_CACHE_PATH)
+            _SCORE_CACHE.update(zip(table.column("key").to_pylist(), table.column("score").to_pylist()))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable score cache {SCORE_CACHE_PATH}: {e}")
+    return _SCORE_CACHE
+
+
+def _store_scores(keys: list[bytes], scores: list[float]) -> None:
+    global _SCORE_CACHE_DIRTY
+    _SCORE_CACHE.update(zip(keys, scores))
+    _SCORE_CACHE_DIRTY = True
+    excess = len(_SCORE_CACHE) - SCORE_CACHE_MAX
+    if excess > 0:
+        # Dicts keep insertion order, so the first keys are the oldest entries
+        for k in list(islice(_SCORE_CACHE, excess)):
+            del _SCORE_CACHE[k]
+
+
+def _write_judge_cache(keys: list[bytes], scores: list[float]) -> None:
+    # Atomic tmp + os.replace so a crash never leaves a torn parquet file
+    table = pa.table({"key": pa.array(keys, type=pa.binary(16)), "score": pa.array(scores, type=pa.float64())})
+    SCORE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SCORE_CACHE_PATH.with_suffix(f".parquet.{os.getpid()}.{threading.get_ident()}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, SCORE_CACHE_PATH)
+
+
+async def flush_score_cache() -> None:
+    """Persist new judge scores, if any, on a worker thread; call once per step."""
+    global _SCORE_CACHE_DIRTY
+    loop = asyncio.get_running_loop()
+    lock = _FLUSH_LOCKS.get(loop)
+    if lock is None:
+        lock = _FLUSH_LOCKS[loop] = asyncio.Lock()
+    # Serialized so an older snapshot never replaces a newer file
+    async with lock:
+        if not _SCORE_CACHE_DIRTY:
+            return
+        # Snapshot on the loop thread; judges may keep adding entries meanwhile
+        keys, scores = list(_SCORE_CACHE.keys()), list(_SCORE_CACHE.values())
+        _SCORE_CACHE_DIRTY = False
+        try:
+            await asyncio.to_thread(_write_judge_cache, keys, scores)
+        except BaseException:
+            _SCORE_CACHE_DIRTY = True
+            raise
+
+
+# Plain substring checks (no word boundaries), run against body.lower()
+_CTA_RE = re.compile("cta|chat|call")
+_API_RE = re.compile("api|sdk")
 
 
 def _offline_score_email(subject: str, body: str, citations: list[str]) -> float:
     score = 0.0
+    low = body.lower()
     if 5 <= len(subject) <= 90:
         score += 0.2
-    if ("cta" in body.lower()) or ("chat" in body.lower()) or ("call" in body.lower()):
+    if _CTA_RE.search(low):
         score += 0.2
     if len(citations) >= 1:
         score += 0.2
-    if "integration" in body.lower():
+    if "integration" in low:
         score += 0.2
-    if ("api" in body.lower()) or ("sdk" in body.lower()):
+    if _API_RE.search(low):
         score += 0.2
     return min(score, 1.0)
 
 
-@weave.op()
-async def score_trajectory_group(group: art.TrajectoryGroup) -> art.TrajectoryGroup:
-    if os.getenv("OPENAI_API_KEY"):
-        logger.info("Using LLMJudge scoring (online)")
+_JUDGE_SYSTEM = (
+    "You are a strict email judge. Score each candidate (0..1) on personalization, alignment, clarity, CTA, and grounding. "
+)
+_JUDGE_CLIENTS: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI] = WeakKeyDictionary()
+# Keep-alive pool shared by every judge call on a loop; the semaphore bounds actual concurrency
+_JUDGE_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
 
-        async def _llm_judge_scores(cands: list[tuple[str, str]]) -> list[float]:
-            """Return absolute scores in [0,1] for each (subject, body)."""
-            client = AsyncOpenAI()
-            items = []
-            for idx, (subj, body) in enumerate(cands, 1):
-                items.append({"id": idx, "subject": subj, "body": body})
-            prompt = {
-                "role": "system",
-                "content": (
-                    "You are a strict email judge. Score each candidate (0..1) on personalization, alignment, clarity, CTA, and grounding. "
-                    "Return JSON with a 'scores' array of floats (length = number of candidates)."
-                ),
-            }
-            user = {
-                "role": "user",
-                "content": json.dumps({"candidates": items}),
-            }
-            resp = await client.chat.completions.create(
-                model=os.getenv("JUDGE_MODEL", "gpt-4o-mini"), temperature=0.0, messages=[prompt, user]
-            )
-            text = resp.choices[0].message.content or "{}"
-            try:
-                data = json.loads(text)
-                raw_scores = data.get("scores", [])
-                scores = [float(s) for s in raw_scores]
-            except Exception:
-                # Fallback: simple descending scores
-                scores = [1.0 - (i / max(1, len(cands) - 1)) for i in range(len(cands))]
-            # Clip to [0,1] without renormalizing to preserve absolute scale
-            return [min(1.0, max(0.0, s)) for s in scores]
-
-        # Build candidates from trajectories
-        candidates: list[tuple[str, str]] = []
-        for t in group.trajectories:
-            subject = ""
-            body = ""
-            if hasattr(t, "final_email") and t.final_email is not None:
-                subject = t.final_email.subject
-                body = t.final_email.body
-            else:
-                msgs = t.messages()
-                body = msgs[-1]["content"] if msgs else ""
-            candidates.append((subject, body))
-
-        scores = await _llm_judge_scores(candidates)
-
-        # Compute ranks based on absolute scores (descending); 1 is best
-        order = sorted(range(len(scores)), key=lambda i: -scores[i])
-        rank_map = {idx: rank + 1 for rank, idx in enumerate(order)}
-
-        trajectories = []
-        traj_ids = []
+
+def _judge_client() -> AsyncOpenAI:
+    """One AsyncOpenAI client per event loop (httpx pools are loop-bound), reused across judge calls."""
+    loop = asyncio.get_running_loop()
+    client = _JUDGE_CLIENTS.get(loop)
+    if client is None:
+        client = _JUDGE_CLIENTS[loop] = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=_JUDGE_LIMITS))
+    return client
+
+
+async def _judge(system: str, payload: dict, **kwargs) -> str:
+    async with _judge_semaphore():
+        resp = await _judge_client().chat.completions.create(
+            model=os.getenv("JUDGE_MODEL", "gpt-4o-mini"),
+            temperature=0.0,
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": json.dumps(payload)}],
+            **kwargs,
+        )
+    return resp.choices[0].message.content or "{}"
+
+
+def _fallback_scores(n: int) -> list[float]:
+    # Simple descending scores
+    return [1.0 - (i / max(1, n - 1)) for i in range(n)]
+
+
+def _clip_scores(scores: list[float]) -> list[float]:
+    # Clip to [0,1] without renormalizing to preserve absolute scale
+    return [min(1.0, max(0.0, s)) for s in scores]
+
+
+def _candidates(group: art.TrajectoryGroup) -> list[Candidate]:
+    candidates: list[Candidate] = []
+    for t in group.trajectories:
+        subject = ""
+        body = ""
+        citations: list[str] = []
+        # Plain art.Trajectory has no final_email field; ProjectTrajectory always does
+        fe = getattr(t, "final_email", None)
+        if fe is not None:
+            subject = fe.subject
+            body = fe.body
+            citations = fe.citations
+        else:
+            msgs = t.messages()
+            body = msgs[-1]["content"] if msgs else ""
+        candidates.append((subject, body, citations))
+    return candidates
+
+
+def _candidate_items(cands: list[Candidate]) -> list[dict]:
+    return [{"id": idx, "subject": subj, "body": body} for idx, (subj, body, _) in enumerate(cands, 1)]
+
+
+def _split_cached(cands: list[Candidate]) -> tuple[list[bytes], list[float | None], list[Candidate]]:
+    """Return each candidate's cache key, its cached score (None on a miss) and the candidates to judge.
+
+    The hit/miss snapshot is taken before the judge is awaited; merging relies on it
+    rather than the live cache, which concurrently judged groups may fill meanwhile.
+    """
+    model = os.getenv("JUDGE_MODEL", "gpt-4o-mini")
+    cache = _judge_cache()
+    keys = [_score_key(subj, body, cites, model) for subj, body, cites in cands]
+    cached = [cache.get(k) for k in keys]
+    misses = [c for c, score in zip(cands, cached) if score is None]
+    return keys, cached, misses
+
+
+def _merge_cached(keys: list[bytes], cached: list[float | None], judged: list[float] | None) -> list[float]:
+    """Fill scores from the cache snapshot and judged misses (in order), caching a complete reply."""
+    if judged is None:
+        # Unparseable reply: fall back over the whole group, as before, and cache nothing
+        return _clip_scores(_fallback_scores(len(keys)))
+    judged = _clip_scores(judged)
+    it = iter(judged)
+    scores: list[float] = []
+    for score in cached:
+        if score is None:
+            score = next(it, None)
+            if score is None:
+                # Short reply: stop here so callers keep zip-truncation semantics
+                break
+        scores.append(score)
+    miss_keys = [k for k, score in zip(keys, cached) if score is None]
+    if len(judged) == len(miss_keys):
+        _store_scores(miss_keys, judged)
+    return scores
+
+
+async def _llm_judge_scores(cands: list[Candidate]) -> list[float]:
+    """Return absolute scores in [0,1] for each candidate, judging only uncached ones."""
+    keys, cached, misses = _split_cached(cands)
+    logger.debug(f"Judge cache: {len(cands) - len(misses)} hits, {len(misses)} misses")
+    if not misses:
+        return [score for score in cached if score is not None]
+    text = await _judge(
+        _JUDGE_SYSTEM + "Return JSON with a 'scores' array of floats (length = number of candidates).",
+        {"candidates": _candidate_items(misses)},
+    )
+    try:
+        judged: list[float] | None = [float(x) for x in json.loads(text).get("scores", [])]
+    except Exception:
+        judged = None
+    return _merge_cached(keys, cached, judged)
+
+
+async def _llm_judge_groups(groups_cands: list[list[Candidate]]) -> list[list[float]]:
+    """Judge every group's uncached candidates in one request; groups are scored independently."""
+    split = [_split_cached(cands) for cands in groups_cands]
+    pending = [gi for gi, (_, _, misses) in enumerate(split, 1) if misses]
+    n_miss = sum(len(m) for _, _, m in split)
+    logger.debug(f"Judge cache: {sum(map(len, groups_cands)) - n_miss} hits, {n_miss} misses")
+    by_id: dict[int, list[float]] = {}
+    if pending:
+        payload = {"groups": [{"id": gi, "candidates": _candidate_items(split[gi - 1][2])} for gi in pending]}
+        text = await _judge(
+            _JUDGE_SYSTEM
+            + "Candidates are only compared within their own group. Return JSON "
+            + '{"groups": [{"id": <group id>, "scores": [floats, one per candidate in that group]}]}.',
+            payload,
+            response_format={"type": "json_object"},
+        )
+        try:
+            for g in json.loads(text).get("groups", []):
+                try:
+                    by_id[int(g["id"])] = [float(x) for x in g.get("scores", [])]
+                except Exception:
+                    continue
+        except Exception:
+            pass
+    # Groups missing from the reply fall back individually
+    return [
+        _merge_cached(keys, cached, by_id.get(gi, [] if not misses else None))
+        for gi, (keys, cached, misses) in enumerate(split, 1)
+    ]
+
+
+def _offline_scores(group: art.TrajectoryGroup) -> list[float]:
+    offline_scores: list[float] = []
+    for subject, body, citations in _candidates(group):
+        key = _score_key(subject, body, citations)
+        score = _OFFLINE_CACHE.get(key)
+        if score is None:
+            score = _OFFLINE_CACHE[key] = float(_offline_score_email(subject, body, citations))
+        offline_scores.append(score)
+    return offline_scores
+
+
+def _apply_scores(group: art.TrajectoryGroup, scores: list[float], rubric_key: str) -> art.TrajectoryGroup:
+    """Set judge scores as rewards and log RULER feedback; blending is left to blend_rewards."""
+    # Compute ranks based on absolute scores (descending); 1 is best
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])
+    rank_map = {idx: rank + 1 for rank, idx in enumerate(order)}
+
+    trajectories = []
+    # One timestamp per group; sub-group granularity carries no meaning
+    now = datetime.utcnow()
+    with FeedbackWriter() as writer:
         for idx, (t, s) in enumerate(zip(group.trajectories, scores)):
             t.reward = float(s)
             trajectories.append(t)
             tid = hash_trajectory(t.messages_and_choices)
-            traj_ids.append(tid)
             fb = RULERFeedback(
                 trajectory_id=tid,
-                prospect_id=str(t.metadata.get("prospect_id", "unknown")) if isinstance(t.metadata, dict) else "unknown",
-                step=int(t.metadata.get("step", 0)) if isinstance(t.metadata, dict) else 0,
-                ts=datetime.utcnow(),
+                prospect_id=str(t.metadata.get("prospect_id", "unknown")),
+                step=int(t.metadata.get("step", 0)),
+                ts=now,
                 rank=int(rank_map.get(idx, 1)),
                 group_size=len(group.trajectories),
-                rubric={"llm_judge": float(s)},
+                rubric={rubric_key: float(s)},
             )
-            append_event(fb)
+            writer.write(fb)
+    return art.TrajectoryGroup(trajectories=trajectories)
 
-        blended = compute_rewards(traj_ids, RewardMixConfig())
-        for t in trajectories:
-            tid = hash_trajectory(t.messages_and_choices)
-            t.reward = float(blended.get(tid, getattr(t, "reward", 0.0)))
-        return art.TrajectoryGroup(trajectories=trajectories)
+
+def blend_rewards(groups: list[art.TrajectoryGroup]) -> list[art.TrajectoryGroup]:
+    """Replace judge rewards with blended feedback rewards, in one compute_rewards call for all groups."""
+    trajectories = [t for g in groups for t in g.trajectories]
+    # hash_trajectory caches per list object, so these ids come from the logging pass
+    traj_ids = [hash_trajectory(t.messages_and_choices) for t in trajectories]
+    blended = compute_rewards(traj_ids, RewardMixConfig())
+    for t, tid in zip(trajectories, traj_ids):
+        t.reward = float(blended.get(tid, t.reward))
+    return groups
+
+
+@weave.op()
+async def score_trajectory_group_local(group: art.TrajectoryGroup) -> art.TrajectoryGroup:
+    """Judge one group and log its feedback without blending; follow up with blend_rewards."""
+    if os.getenv("OPENAI_API_KEY"):
+        logger.info("Using LLMJudge scoring (online)")
+        scores = await _llm_judge_scores(_candidates(group))
+        return _apply_scores(group, scores, "llm_judge")
 
     logger.info("Using offline fallback scoring")
-    trajectories = []
-    traj_ids = []
-    offline_scores: list[float] = []
-    for t in group.trajectories:
-        messages = t.messages()
-        subject = ""
-        body = messages[-1]["content"] if messages else ""
-        citations: list[str] = []
-        if hasattr(t, "final_email") and t.final_email is not None:
-            subject = t.final_email.subject
-            body = t.final_email.body
-            citations = t.final_email.citations
-        score = _offline_score_email(subject, body, citations)
-        offline_scores.append(float(score))
-
-    # Ranks for offline as well
-    order = sorted(range(len(offline_scores)), key=lambda i: -offline_scores[i])
-    rank_map = {idx: rank + 1 for rank, idx in enumerate(order)}
+    return _apply_scores(group, _offline_scores(group), "offline_reward")
 
-    for idx, t in enumerate(group.trajectories):
-        t.reward = float(offline_scores[idx])
-        trajectories.append(t)
-
-        tid = hash_trajectory(t.messages_and_choices)
-        traj_ids.append(tid)
-        fb = RULERFeedback(
-            trajectory_id=tid,
-            prospect_id=str(t.metadata.get("prospect_id", "unknown")) if isinstance(t.metadata, dict) else "unknown",
-            step=int(t.metadata.get("step", 0)) if isinstance(t.metadata, dict) else 0,
-            ts=datetime.utcnow(),
-            rank=int(rank_map.get(idx, 1)),
-            group_size=len(group.trajectories),
-            rubric={"offline_reward": float(offline_scores[idx])},
-        )
-        append_event(fb)
 
-    blended = compute_rewards(traj_ids, RewardMixConfig())
-    for t in trajectories:
-        tid = hash_trajectory(t.messages_and_choices)
-        t.reward = float(blended.get(tid, getattr(t, "reward", 0.0)))
-    return art.TrajectoryGroup(trajectories=trajectories)
+@weave.op()
+async def score_trajectory_group(group: art.TrajectoryGroup) -> art.TrajectoryGroup:
+    return blend_rewards([await score_trajectory_group_local(group)])[0]
+
 
+@weave.op()
+async def score_trajectory_groups(groups: list[art.TrajectoryGroup]) -> list[art.TrajectoryGroup]:
+    """Score several finished groups; online, all candidates go out in one judge request."""
+    if not groups:
+        return []
+    if os.getenv("OPENAI_API_KEY"):
+        logger.info(f"Using LLMJudge scoring (online, {len(groups)} groups in one request)")
+        all_scores = await _llm_judge_groups([_candidates(g) for g in groups])
+        judged = [_apply_scores(g, scores, "llm_judge") for g, scores in zip(groups, all_scores)]
+    else:
+        logger.info("Using offline fallback scoring")
+        judged = [_apply_scores(g, _offline_scores(g), "offline_reward") for g in groups]
+    return blend_rewards(judged)
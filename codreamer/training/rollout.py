@@ -1,23 +1,33 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import time
+from collections.abc import Iterable
+from functools import lru_cache
 from textwrap import dedent
+from typing import Any
+from weakref import WeakKeyDictionary
 
 import art
+from art.trajectories import get_messages
 import os
+import httpx
 from langchain_core.utils.function_calling import convert_to_openai_tool
 from loguru import logger
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, RateLimitError
+import orjson
 from pydantic import BaseModel
 
-from ..core.config import MAX_TURNS
+from ..core.config import MAX_CONCURRENCY, MAX_TURNS, ROLLOUT_QPS
 from ..core.data_models import FinalEmail, Scenario
 from ..core.prompts import SYSTEM_PROMPT
 import weave
 from .tools import (
+    KG_REQUEST_CACHE,
     finalize_email,
     get_connected_nodes,
     get_relevant_context,
+    prefetch_relevant_context,
     propose_email,
 )
 
@@ -31,46 +41,196 @@ class ScenarioInput(BaseModel):
     scenario: Scenario
 
 
-async def _openai_client(model: art.Model) -> AsyncOpenAI:
-    return AsyncOpenAI(base_url=model.inference_base_url, api_key=model.inference_api_key)
+# Agent tools; schemas are a pure function of the functions, so build them once at import
+_TOOLS = (get_connected_nodes, get_relevant_context, propose_email, finalize_email)
+_TOOLS_BY_NAME = {t.__name__: t for t in _TOOLS}
+_TOOL_SCHEMAS = [convert_to_openai_tool(t) for t in _TOOLS]
 
 
-@weave.op()
-async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTrajectory:
-    sc = scenario_input.scenario
-    traj = ProjectTrajectory(reward=0.0, messages_and_choices=[], metadata={"step": scenario_input.step, "prospect_id": sc.prospect.prospect_id})
-
-    system = dedent(
+@lru_cache(maxsize=1024)
+def _system_prompt(name: str, title: str, company: str, industry: str, goal: str, seeds: tuple[str, ...]) -> str:
+    # Scenarios repeat across RL epochs; keyed on every rendered field so each distinct prompt is built once
+    return dedent(
         f"""
         {SYSTEM_PROMPT}
 
-        Prospect: {sc.prospect.name} ({sc.prospect.title or ''}) at {sc.prospect.company or ''} in {sc.prospect.industry or ''}
-        Goal: {sc.goal}
-        Starting nodes: {sc.seed_nodes}
+        Prospect: {name} ({title}) at {company} in {industry}
+        Goal: {goal}
+        Starting nodes: {list(seeds)}
         """
     )
 
+
+# Attempts per completion when the inference endpoint rate-limits us
+RATE_LIMIT_ATTEMPTS = 4
+
+
+# Inference clients per event loop (httpx pools are loop-bound), keyed by (base_url, api_key)
+_CLIENTS: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], AsyncOpenAI]] = WeakKeyDictionary()
+_CLIENT_LIMITS = httpx.Limits(max_connections=256, max_keepalive_connections=128)
+
+
+def get_client(model: art.Model) -> AsyncOpenAI:
+    """Shared AsyncOpenAI client for the model's inference endpoint, reused across rollouts."""
+    key = (str(model.inference_base_url), str(model.inference_api_key))
+    clients = _CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = AsyncOpenAI(
+            base_url=model.inference_base_url,
+            api_key=model.inference_api_key,
+            http_client=DefaultAsyncHttpxClient(limits=_CLIENT_LIMITS),
+        )
+    return client
+
+
+async def aclose_clients() -> None:
+    """Close the current loop's cached inference clients.
+
+    Only the code that owns the loop should call this, right before it shuts down;
+    other coroutines on a shared loop (e.g. API runs) may still hold these clients.
+    """
+    clients = _CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+class AsyncTokenBucket:
+    """Async token bucket: acquire() waits for a token refilled at `rate` per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+# One bucket per event loop (asyncio.Lock is loop-bound), shared by every rollout on it; None when disabled
+_BUCKETS: WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTokenBucket | None] = WeakKeyDictionary()
+
+
+def _rate_limiter() -> AsyncTokenBucket | None:
+    """Pace completions at ROLLOUT_QPS requests per second (env override; <= 0 disables)."""
+    loop = asyncio.get_running_loop()
+    try:
+        return _BUCKETS[loop]
+    except KeyError:
+        qps = float(os.getenv("ROLLOUT_QPS", str(ROLLOUT_QPS)))
+        bucket = _BUCKETS[loop] = AsyncTokenBucket(qps, capacity=max(1, MAX_CONCURRENCY)) if qps > 0 else None
+        return bucket
+
+
+async def _complete(client: AsyncOpenAI, **kwargs: Any) -> Any:
+    # Pace requests under the provider's limit, and retry with simple exponential
+    # backoff on rate limits that still happen (on top of the SDK's own retries)
+    bucket = _rate_limiter()
+    attempts = 0
+    delay = 2.0
+    while True:
+        if bucket is not None:
+            await bucket.acquire()
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except RateLimitError as e:
+            attempts += 1
+            if attempts >= RATE_LIMIT_ATTEMPTS:
+                raise
+            logger.warning(f"rollout: rate limited (attempt {attempts}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def run_rollouts(
+    model: art.Model, inputs: Iterable[ScenarioInput], max_concurrency: int = MAX_CONCURRENCY
+) -> list[ProjectTrajectory]:
+    """Run rollout() over inputs with at most `max_concurrency` in flight; results keep input order.
+
+    Runs in a TaskGroup: if one rollout fails the rest are cancelled instead of
+    spending further requests, and the failure surfaces as an ExceptionGroup.
+    """
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _guarded(x: ScenarioInput) -> ProjectTrajectory:
+        async with sem:
+            return await rollout(model, x)
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(_guarded(x)) for x in inputs]
+    return [t.result() for t in tasks]
+
+
+async def _call_tool(fn: Any, args: dict[str, Any], warmup: asyncio.Task[None] | None = None) -> Any:
+    # The traced tool call still runs, so traces record exactly what the agent asked for;
+    # after a matching warm-up it is a memo hit (warm-up errors resurface in the call itself)
+    if warmup is not None:
+        try:
+            await warmup
+        except Exception:
+            pass
+    return await asyncio.to_thread(fn, **args)
+
+
+@weave.op()
+async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTrajectory:
+    # Subgraph work is memoized for the lifetime of this rollout (tool threads share the dict)
+    token = KG_REQUEST_CACHE.set({})
+    try:
+        return await _rollout(model, scenario_input)
+    finally:
+        KG_REQUEST_CACHE.reset(token)
+
+
+async def _rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTrajectory:
+    sc = scenario_input.scenario
+    traj = ProjectTrajectory(reward=0.0, messages_and_choices=[], metadata={"step": scenario_input.step, "prospect_id": sc.prospect.prospect_id})
+
+    p = sc.prospect
+    system = _system_prompt(p.name, p.title or "", p.company or "", p.industry or "", sc.goal, tuple(sc.seed_nodes))
+
     traj.messages_and_choices = [
         {"role": "system", "content": system},
         {"role": "user", "content": "Generate a grounded email by calling tools. End by calling finalize_email."},
     ]
+    # Request-side message list, grown alongside the trajectory instead of rebuilt via
+    # traj.messages() every turn. Tool dicts are shared, so filled placeholders show in both.
+    msgs: list[dict[str, Any]] = get_messages(traj.messages_and_choices)
 
-    tools = [
-        get_connected_nodes,
-        get_relevant_context,
-        propose_email,
-        finalize_email,
-    ]
-    tools_by_name = {t.__name__: t for t in tools}
-    traj.tools = [convert_to_openai_tool(t) for t in tools]
+    def _push(message: dict[str, Any]) -> None:
+        traj.messages_and_choices.append(message)
+        msgs.append(message)
 
-    client = await _openai_client(model)
+    traj.tools = _TOOL_SCHEMAS
+
+    client = get_client(model)
     subject_text: str | None = None
     body_text: str | None = None
-    citation_ids: set[str] = set()
+    # Citations in first-seen order; the set only deduplicates
+    cites: list[str] = []
+    cites_set: set[str] = set()
+
+    def _add_cites(nids: Iterable[Any]) -> None:
+        for nid in map(str, nids):
+            if nid not in cites_set:
+                cites_set.add(nid)
+                cites.append(nid)
 
-    logger.info(
-        f"rollout(start): step={scenario_input.step} prospect={sc.prospect.prospect_id} name={sc.prospect.name} goal='{sc.goal}' seeds={sc.seed_nodes}"
+    # Hot-path logs are debug and lazy: the message is only built when a sink wants it
+    logger.opt(lazy=True).debug(
+        "{}",
+        lambda: f"rollout(start): step={scenario_input.step} prospect={sc.prospect.prospect_id} name={sc.prospect.name} goal='{sc.goal}' seeds={sc.seed_nodes}",
     )
 
     effective_max_turns = MAX_TURNS
@@ -80,20 +240,34 @@ async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTra
     except Exception:
         effective_max_turns = MAX_TURNS
 
+    # Speculative, untraced warm-up of get_relevant_context(node_id=top) for the top
+    # neighbor of each get_connected_nodes result, run while the next completion is decoding
+    prefetched: dict[str, asyncio.Task[None]] = {}
+
+    def _drop_prefetched() -> None:
+        # Unused guesses are discarded (the tool memo they warmed stays warm)
+        for task in prefetched.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # retrieve it so asyncio does not log it as unhandled
+        prefetched.clear()
+
     for turn_idx in range(1, effective_max_turns + 1):
         finalized_now = False
         nudged_now = False
         tool_names: list[str] = []
-        response = await client.chat.completions.create(
-            model=model.get_inference_name(), temperature=0.7, messages=traj.messages(), tools=traj.tools
+        response = await _complete(
+            client, model=model.get_inference_name(), temperature=0.7, messages=msgs, tools=traj.tools
         )
         choice = response.choices[0]
         msg = choice.message
         traj.messages_and_choices.append(choice)
+        msgs.extend(get_messages([choice]))
 
         if not msg.tool_calls:
             # Nudge: explicitly ask the model to use tools and finalize
-            traj.messages_and_choices.append({
+            _push({
                 "role": "user",
                 "content": (
                     "Use get_connected_nodes to browse, get_relevant_context(node_id) to fetch evidence, then "
@@ -101,50 +275,74 @@ async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTra
                 ),
             })
             nudged_now = True
-            logger.info(
-                f"turn[{turn_idx}/{effective_max_turns}]: calls=0 tools=[] subject={subject_text is not None} body={body_text is not None} "
-                f"cites={len(citation_ids)} nudged={nudged_now} finalized={finalized_now}"
+            _drop_prefetched()
+            logger.opt(lazy=True).debug(
+                "{}",
+                lambda: f"turn[{turn_idx}/{effective_max_turns}]: calls=0 tools=[] subject={subject_text is not None} "
+                f"body={body_text is not None} cites={len(cites)} nudged={nudged_now} finalized={finalized_now}",
             )
             continue
 
+        # AsyncFC-style dispatch: each KG read starts as a task as soon as it is parsed and
+        # gets a placeholder tool message; results are resolved at the next barrier
+        # (finalize_email, or before the next completion request needs them)
+        pending: list[tuple[dict[str, Any], str, asyncio.Task[Any]]] = []
+
+        async def _resolve() -> None:
+            results = await asyncio.gather(*(task for _slot, _name, task in pending))
+            for (slot, name, _task), result in zip(pending, results):
+                slot["content"] = str(result)
+                if name == "get_relevant_context" and isinstance(result, dict):
+                    # Agent writes; we only collect citations
+                    _add_cites(result.get("citations", []))
+                elif name == "get_connected_nodes" and isinstance(result, list) and result:
+                    top = str(result[0])
+                    if top not in prefetched:
+                        prefetched[top] = asyncio.create_task(asyncio.to_thread(prefetch_relevant_context, top))
+            pending.clear()
+
         for call in msg.tool_calls:
             name = call.function.name
-            if name not in tools_by_name:
+            if name not in _TOOLS_BY_NAME:
                 continue
             try:
-                args = json.loads(call.function.arguments)
+                args = orjson.loads(call.function.arguments)
             except (ValueError, TypeError):
                 args = {}
             tool_names.append(name)
 
+            if name != "finalize_email":
+                slot = {"role": "tool", "tool_call_id": call.id, "name": name, "content": ""}
+                _push(slot)
+                node_id = args.get("node_id") if name == "get_relevant_context" and len(args) == 1 else None
+                warmup = prefetched.pop(node_id, None) if isinstance(node_id, str) else None
+                pending.append((slot, name, asyncio.create_task(_call_tool(_TOOLS_BY_NAME[name], args, warmup))))
+                continue
+
+            # Barrier: finalize_email sees citations from every read issued before it
+            await _resolve()
             # Make finalize_email robust to missing args by filling from current state
-            if name == "finalize_email":
-                # Fill subject/body/citations if omitted by the model
-                dir_txt = f"Goal: {sc.goal}"
-                call_subject = args.get("subject", subject_text or dir_txt)
-                call_body = args.get("body", body_text or dir_txt)
-                raw_citations = args.get("citations", None)
-                if isinstance(raw_citations, (list, set, tuple)) and len(raw_citations) > 0:
-                    call_citations = list(raw_citations)
-                else:
-                    call_citations = sorted(citation_ids)
-                result = finalize_email(call_subject, call_body, call_citations)
+            # Fill subject/body/citations if omitted by the model
+            dir_txt = f"Goal: {sc.goal}"
+            call_subject = args.get("subject", subject_text or dir_txt)
+            call_body = args.get("body", body_text or dir_txt)
+            raw_citations = args.get("citations", None)
+            if isinstance(raw_citations, (list, set, tuple)) and len(raw_citations) > 0:
+                call_citations = list(raw_citations)
             else:
-                result = tools_by_name[name](**args)
-            traj.messages_and_choices.append({"role": "tool", "tool_call_id": call.id, "name": name, "content": str(result)})
-            if name == "get_relevant_context" and isinstance(result, dict):
-                # Agent writes; we only collect citations
-                cits = result.get("citations", [])
-                for nid in cits:
-                    citation_ids.add(str(nid))
-            if name == "finalize_email":
-                traj.final_email = result
-                finalized_now = True
-                break
+                call_citations = sorted(cites)
+            result = finalize_email(call_subject, call_body, call_citations)
+            _push({"role": "tool", "tool_call_id": call.id, "name": name, "content": str(result)})
+            traj.final_email = result
+            finalized_now = True
+            break
+        # Prefetches this turn did not ask for are stale; the reads just resolved may queue new ones
+        _drop_prefetched()
+        await _resolve()
 
         # Nudge to finalize if we have both subject and body but no finalize yet
         if traj.final_email is None and subject_text and body_text:
-            traj.messages_and_choices.append({
+            _push({
                 "role": "user",
                 "content": (
                     "You have drafted the subject and body. Optionally call propose_email(subject, body) to reflect, then "
@@ -153,14 +351,17 @@ async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTra
             })
             nudged_now = True
 
-        logger.info(
-            f"turn[{turn_idx}/{effective_max_turns}]: calls={len(tool_names)} tools={tool_names} subject={subject_text is not None} "
-            f"body={body_text is not None} cites={len(citation_ids)} nudged={nudged_now} finalized={finalized_now}"
+        logger.opt(lazy=True).debug(
+            "{}",
+            lambda: f"turn[{turn_idx}/{effective_max_turns}]: calls={len(tool_names)} tools={tool_names} subject={subject_text is not None} "
+            f"body={body_text is not None} cites={len(cites)} nudged={nudged_now} finalized={finalized_now}",
         )
 
         if finalized_now:
             return traj
 
+    _drop_prefetched()
+
     # Final guard: ensure completion by auto-finalizing if still open (and mark metadata)
     if traj.final_email is None:
         directive = f"Goal: {sc.goal}"
@@ -175,11 +376,10 @@ async def rollout(model: art.Model, scenario_input: ScenarioInput) -> ProjectTra
                     ctx_text = str(ctx.get("text", ""))
                     if ctx_text:
                         body = ctx_text + "\n\n" + body
-                    for nid in ctx.get("citations", []) or []:
-                        citation_ids.add(str(nid))
+                    _add_cites(ctx.get("citations", []) or [])
             except Exception:
                 pass
-        fe = finalize_email(subj, body, sorted(citation_ids))
+        fe = finalize_email(subj, body, sorted(cites))
         traj.messages_and_choices.append({
             "role": "tool",
             "tool_call_id": "local-timeout",
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import functools
+
 from ..core.data_models import Prospect, Scenario
 
 
-def load_synthetic_scenarios() -> list[Scenario]:
-    """Tiny synthetic dataset to run the MVP end-to-end."""
+@functools.lru_cache(maxsize=1)
+def _synthetic_scenarios() -> tuple[Scenario, ...]:
     p = Prospect(
         prospect_id="p1",
         name="Alex Rivera",
@@ -14,7 +16,15 @@ def load_synthetic_scenarios() -> list[Scenario]:
         industry="FinTech",
         tech_stack=["Python", "Kafka"],
     )
-    return [
+    return (
         Scenario(step=0, prospect=p, goal="Secure a 20-minute discovery call", seed_nodes=["Customer Job"]),
-    ]
+    )
+
+
+def load_synthetic_scenarios() -> list[Scenario]:
+    """Tiny synthetic dataset to run the MVP end-to-end.
 
+    Built and validated once per process; each call returns a fresh list over
+    the shared Scenario objects, which callers treat as read-only.
+    """
+    return list(_synthetic_scenarios())
@@ -1,72 +1,131 @@
 from __future__ import annotations
 
-from typing import Any
+from collections import deque
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, TypeVar
 
 from loguru import logger
 import weave
 
+from ..core.config import PROJECT_ROOT
 from ..core.data_models import FinalEmail
-from ..knowledge_graph.kg_scoring import KGScorer
+from ..knowledge_graph.kg_scoring import KGScorer, delta_log_path
 from ..knowledge_graph.kg_store import KnowledgeGraphStore
 
+_GRAPH_PATH = PROJECT_ROOT / "data" / "graph.json"
+_SCORES_PATH = PROJECT_ROOT / "data" / "node_scores.json"
+
+T = TypeVar("T")
+
+# Neighborhoods up to this size are ordered with a plain sort instead of KGScorer.ranked_ids
+_RANK_THRESHOLD = 8
+
+# Per-rollout memo of subgraph-derived data; rollout() installs a fresh dict (None outside a rollout)
+KG_REQUEST_CACHE: ContextVar[dict[tuple[Any, ...], Any] | None] = ContextVar("kg_request_cache", default=None)
+
 
 def _kg() -> KnowledgeGraphStore:
-    # Load fresh KG each call to reflect updated graphs between runs
-    return KnowledgeGraphStore()
+    # One parsed graph per version of graph.json: reloads only after the file changes between runs
+    return _kg_at(_file_sig(_GRAPH_PATH))
+
 
 def _scorer() -> KGScorer:
-    # Load fresh scores each call to reflect resets/updates between runs
-    return KGScorer()
+    # Same for scores (snapshot + delta log); reuses the cached graph for reconciliation
+    return _scorer_at(_kg_sig())
+
+
+@lru_cache(maxsize=1)
+def _kg_at(_sig: tuple[int, int]) -> KnowledgeGraphStore:
+    return KnowledgeGraphStore(_GRAPH_PATH)
+
+
+@lru_cache(maxsize=1)
+def _scorer_at(_sig: tuple[tuple[int, int], ...]) -> KGScorer:
+    return KGScorer(_SCORES_PATH, kg=_kg())
+
+
+def _file_sig(path: Path) -> tuple[int, int]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return (0, -1)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _kg_sig() -> tuple[tuple[int, int], ...]:
+    """Cache key for everything the KG tools read; any write to graph or scores changes it."""
+    return (_file_sig(_GRAPH_PATH), _file_sig(_SCORES_PATH), _file_sig(delta_log_path(_SCORES_PATH)))
+
+
+def _request_cached(key: tuple[Any, ...], build: Callable[[], T]) -> T:
+    cache = KG_REQUEST_CACHE.get()
+    if cache is None:
+        return build()
+    try:
+        return cache[key]
+    except KeyError:
+        value = cache[key] = build()
+        return value
+
+
+def _subgraph_nodes(node_id: str, radius: int, sig: tuple[tuple[int, int], ...]) -> list[dict[str, Any]]:
+    return _request_cached(("subgraph", node_id, radius, sig), lambda: _kg().neighborhood([node_id], radius)[0])
+
+
+def _reachable_view(
+    node_id: str, radius: int, sig: tuple[tuple[int, int], ...]
+) -> tuple[list[dict[str, Any]], set[str], dict[str, str]]:
+    """Subgraph nodes around node_id, the ones that can reach a Product Feature node, and id -> content."""
+    return _request_cached(("reachable", node_id, radius, sig), lambda: _build_reachable_view(node_id, radius))
 
 
 @weave.op()
 def get_connected_nodes(node_id: str) -> list[str]:
     """Return a small ranked set of neighbor node_ids for browsing."""
-    kg = _kg()
-    nodes, edges = kg.subgraph(center=[node_id], radius=1)
-    ranked = _scorer().rank_nodes(query=node_id, nodes=nodes)
+    return list(_connected_nodes_cached(node_id, _kg_sig()))
+
+
+@lru_cache(maxsize=4096)
+def _connected_nodes_cached(node_id: str, _sig: tuple[tuple[int, int], ...]) -> tuple[str, ...]:
+    # _sig is only part of the cache key (see _kg_sig)
+    nodes = _subgraph_nodes(node_id, 1, _sig)
+    if len(nodes) <= _RANK_THRESHOLD:
+        # Same order as ranked_ids (stable, descending score) without the numpy round trip
+        get = _scorer().scores.get
+        ranked = sorted((n["node_id"] for n in nodes), key=lambda i: -get(i, 0.0))
+    else:
+        ranked = _scorer().ranked_ids(nodes)
     # Filter out the center node if present
-    return [nid for nid in ranked if nid != node_id]
+    return tuple(nid for nid in ranked if nid != node_id)
 
 
 @weave.op()
 def get_relevant_context(node_id: str, k: int = 5, radius: int = 2, max_chars: int = 800) -> dict[str, Any]:
     """Synthesize a concise, coherent evidence block from a node and top-scored neighbors."""
-    kg = _kg()
-    nodes, _edges = kg.subgraph(center=[node_id], radius=radius)
+    text, citations = _relevant_context_cached(node_id, k, radius, max_chars, _kg_sig())
+    return {"text": text, "citations": list(citations)}
 
-    # Constraint: prefer nodes that lie on any path ending at a "Product Feature" node
-    target_ids = {nid for nid in kg.nodes.keys() if "Product Feature" in nid}
 
-    # Precompute adjacency for quick lookups within subgraph
-    sub_ids = {n["node_id"] for n in nodes}
-    adj: dict[str, list[str]] = {}
-    for nid in sub_ids:
-        adj[nid] = [t for (t, _lbl) in kg.out_edges.get(nid, []) if t in sub_ids]
-
-    # Helper: can reach any target within remaining steps
-    def can_reach_target(start: str, max_steps: int) -> bool:
-        if start in target_ids:
-            return True
-        frontier = [(start, 0)]
-        seen: set[str] = {start}
-        while frontier:
-            cur, d = frontier.pop(0)
-            if d >= max_steps:
-                continue
-            for nxt in adj.get(cur, []):
-                if nxt in target_ids:
-                    return True
-                if nxt not in seen:
-                    seen.add(nxt)
-                    frontier.append((nxt, d + 1))
-        return False
+def prefetch_relevant_context(node_id: str) -> None:
+    """Untraced warm-up of get_relevant_context(node_id) with its default arguments."""
+    # Same positional key get_relevant_context builds, so its next call is a memo hit
+    _relevant_context_cached(node_id, 5, 2, 800, _kg_sig())
+
+
+@lru_cache(maxsize=4096)
+def _relevant_context_cached(
+    node_id: str, k: int, radius: int, max_chars: int, _sig: tuple[tuple[int, int], ...]
+) -> tuple[str, tuple[str, ...]]:
+    nodes, reachable, info = _reachable_view(node_id, radius, _sig)
 
     # Filter nodes to those on some path toward a Product Feature node
-    filtered_nodes = [n for n in nodes if can_reach_target(n["node_id"], radius)]
+    filtered_nodes = [n for n in nodes if n["node_id"] in reachable]
     nodes_for_ranking = filtered_nodes if filtered_nodes else nodes
 
-    ranked_ids = _scorer().rank_nodes(query=node_id, nodes=nodes_for_ranking)
+    ranked_ids = _scorer().ranked_ids(nodes_for_ranking)
     picked: list[str] = []
     for nid in ranked_ids:
         if nid not in picked:
@@ -77,15 +136,51 @@ def get_relevant_context(node_id: str, k: int = 5, radius: int = 2, max_chars: i
     # Build text; include center first if present
     text_parts: list[str] = []
     citations: list[str] = []
-    info = {n["node_id"]: n.get("content", "") for n in nodes}
+    total = 0
     for nid in picked:
-        if nid in info:
-            text_parts.append(info[nid])
+        part = info.get(nid)
+        if part is not None:
+            text_parts.append(part)
             citations.append(nid)
-        if sum(len(t) for t in text_parts) >= max_chars:
+            total += len(part)
+        # Running total: the parts stop at the first one that crosses the cap
+        if total >= max_chars:
             break
     text = " \n".join(text_parts)[:max_chars]
-    return {"text": text, "citations": citations}
+    return text, tuple(citations)
+
+
+def _build_reachable_view(node_id: str, radius: int) -> tuple[list[dict[str, Any]], set[str], dict[str, str]]:
+    kg = _kg()
+    nodes, _edges = kg.neighborhood([node_id], radius)
+
+    # Constraint: prefer nodes that lie on any path ending at a "Product Feature" node
+    target_ids = {nid for nid in kg.nodes.keys() if "Product Feature" in nid}
+
+    # Precompute reverse adjacency for quick lookups within subgraph
+    sub_ids = {n["node_id"] for n in nodes}
+    radj: dict[str, list[str]] = {}
+    out_targets = kg.out_targets
+    for nid in sub_ids:
+        for t in out_targets(nid):
+            if t in sub_ids:
+                radj.setdefault(t, []).append(nid)
+
+    # One multi-source reverse BFS from the targets: a node can reach a target
+    # within `radius` steps iff it is within `radius` reverse steps of one
+    reachable: set[str] = target_ids & sub_ids
+    frontier = deque((nid, 0) for nid in reachable)
+    while frontier:
+        cur, d = frontier.popleft()
+        if d >= radius:
+            continue
+        for prev in radj.get(cur, ()):
+            if prev not in reachable:
+                reachable.add(prev)
+                frontier.append((prev, d + 1))
+
+    info = {n["node_id"]: n.get("content", "") for n in nodes}
+    return nodes, reachable, info
 
 
 def rank_nodes(query: str, center: list[str], radius: int) -> list[str]:
@@ -97,13 +192,11 @@ def rank_nodes(query: str, center: list[str], radius: int) -> list[str]:
 
 def compose_subject(directive: str) -> str:
     # Deprecated in MVP
-    logger.debug(f"compose_subject(directive='{directive}')")
     return directive
 
 
 def compose_body(directive: str, constraints: dict[str, str]) -> str:
     # Deprecated in MVP
-    logger.debug(f"compose_body(directive='{directive}', constraints={list(constraints.keys())})")
     return directive
 
 